@@ -1,16 +1,29 @@
-from .core import StarData
+from .core import StarData, SourceCatalog, FrameCutout
 from .photometry import TessPhotometry
+from .apertures import SparseApertureEngine
+from .centroids import centroid_com_batch, centroid_quadratic_batch
+from .astrometry import PointingOffset, select_reference_stars, fit_pointing_offset
 from .catalog import create_catalog, get_star, query_gaia_catalog
 from .download import get_tess_sectors, download_tess_sector_script, download_tess_image, download_tess_images
-from .analysis import load_photometry_data, compute_periodogram
+from .download import ManifestEntry, ScriptIndex, parse_sector_script, filter_manifest, select_target_ccds
+from .download import DownloadEngine, DownloadResult, download_ffi, fetch_fits_header, fetch_ffi_cutout
+from .store import PhotometryStore, ResultsWriter, open_store
+from .analysis import load_photometry_data, load_light_curve, load_pointing_jitter, compute_periodogram, frequency_grid
+from .periodogram import PeriodogramSummary, batch_periodogram, BootstrapSignificance, bootstrap_significance
 from .parallel import process_images_parallel
 
 __all__ = [
-    "StarData",
-    "TessPhotometry",
+    "StarData", "SourceCatalog", "FrameCutout",
+    "TessPhotometry", "SparseApertureEngine",
+    "centroid_com_batch", "centroid_quadratic_batch",
+    "PointingOffset", "select_reference_stars", "fit_pointing_offset",
     "create_catalog", "get_star", "query_gaia_catalog",
     "get_tess_sectors", "download_tess_sector_script", "download_tess_image", "download_tess_images",
-    "load_photometry_data", "compute_periodogram",
+    "ManifestEntry", "ScriptIndex", "parse_sector_script", "filter_manifest", "select_target_ccds",
+    "DownloadEngine", "DownloadResult", "download_ffi", "fetch_fits_header", "fetch_ffi_cutout",
+    "PhotometryStore", "ResultsWriter", "open_store",
+    "load_photometry_data", "load_light_curve", "load_pointing_jitter", "compute_periodogram", "frequency_grid",
+    "PeriodogramSummary", "batch_periodogram", "BootstrapSignificance", "bootstrap_significance",
     "process_images_parallel"
 ]
 
@@ -3,40 +3,67 @@
 Analysis tools.
 """
 
+import csv
+import os
+
 import pandas as pd
 import numpy as np
 from scipy.signal import find_peaks
 
 from coltess.core import StarData
+from coltess.store import open_store
 
 from astropy.coordinates import SkyCoord
 from astropy.time import Time
 from astropy.timeseries import LombScargle
 from astropy import units as u
-from typing import Tuple, List
+from typing import Tuple, List, Optional
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# Light-curve columns returned by load_light_curve, besides the frame name.
+LIGHT_CURVE_COLUMNS = ("jd", "flux", "flux_err", "mag", "mag_err")
+
+# Sidecar index of incremental loads, kept in the photometry directory.
+# One tab-separated row per (target, file) with the file's size, mtime
+# and extracted target row (NaN if the target is not in the file).
+LIGHT_CURVE_INDEX_FILE = "light_curve_index.tsv"
+LIGHT_CURVE_INDEX_COLUMNS = ("target", "file", "size", "mtime_ns", *LIGHT_CURVE_COLUMNS)
+
+
 def load_photometry_data(
         csv_dir: str,
         target_star: StarData,
-        max_sep_arcsec: float = 0.5 
+        max_sep_arcsec: float = 0.5,
+        incremental: bool = False
     ) -> Tuple[np.ndarray, np.ndarray]:
     """
     Load per-frame photometry CSV files and extract a target light curve.
+
+    If ``csv_dir`` holds a result store written with
+    ``output_format="store"``, the light curve is read from it instead.
     
-    For each frame, the source below a maximum angular separation is selected.
+    For each frame, the row whose ``ID`` equals ``target_star.gaia_id`` is
+    selected. Frames without that ID, or all frames if the star has no
+    Gaia ID, fall back to the source below a maximum angular separation.
+    See ``load_light_curve`` for the same data with errors and magnitudes.
     
     Parameters
     ----------
     csv_dir : str
-        Directory containing per-frame CSV photometry files.
+        Directory containing per-frame CSV photometry files or a result
+        store.
     target_ra : float
         Target right ascension in degrees.
     target_dec : float
         Target declination in degrees.
     max_sep_arcsec : float, optional
-        Maximum allowed separation for a valid detection.
+        Maximum allowed separation for a valid detection when matching
+        by position.
+    incremental : bool, optional
+        Only parse files added or changed since the last incremental
+        load, see ``load_light_curve``.
     
     Returns
     -------
@@ -50,49 +77,501 @@ def load_photometry_data(
     RuntimeError
         If no CSV files are found or the target is not detected in any frame.
     """
+    lc = load_light_curve(csv_dir, target_star, max_sep_arcsec, incremental=incremental)
+
+    return lc["jd"].to_numpy(), lc["flux"].to_numpy()
+
+
+def load_light_curve(
+        csv_dir: str,
+        target_star: StarData,
+        max_sep_arcsec: float = 0.5,
+        max_workers: Optional[int] = None,
+        incremental: bool = False
+    ) -> pd.DataFrame:
+    """
+    Load a target light curve with errors and magnitudes.
+
+    CSV files are read concurrently by a thread pool and their rows
+    concatenated into one table. The target is then matched in a single
+    vectorized pass (by Gaia ID, with a positional fallback as in
+    ``load_photometry_data``), and all timestamps are converted with one
+    ``Time`` call.
+
+    With ``incremental=True`` the extracted target row of every file is
+    kept in a sidecar index (``light_curve_index.tsv``) in ``csv_dir``,
+    together with the file's size and mtime. Later calls only parse files
+    that are new or changed since then, so refreshing the light curve of
+    a run that is still writing costs time proportional to the new frames.
+
+    A result store in ``csv_dir`` takes precedence: the light curve is
+    read from it alone, any per-frame CSV files next to it are ignored
+    and ``incremental`` has no effect. A note is printed when either is
+    the case. On both paths frames are labeled by their FITS file name.
+
+    Parameters
+    ----------
+    csv_dir : str
+        Directory containing per-frame CSV photometry files or a result
+        store.
+    target_star : StarData
+        Target star.
+    max_sep_arcsec : float, optional
+        Maximum allowed separation for a valid detection when matching
+        by position.
+    max_workers : int or None, optional
+        Number of reader threads. Defaults to the ``ThreadPoolExecutor``
+        default.
+    incremental : bool, optional
+        Reuse and update the sidecar index of earlier loads. Ignored
+        when reading a result store.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per frame with columns ``jd``, ``flux``, ``flux_err``,
+        ``mag`` and ``mag_err``, indexed by the frame's FITS file name
+        and sorted by time.
+
+    Raises
+    ------
+    RuntimeError
+        If no CSV files are found or the target is not detected in any frame.
+    """
+    target_coord = SkyCoord(target_star.ra, target_star.dec, unit=u.deg)
+    target_id = None if target_star.gaia_id is None else str(target_star.gaia_id)
 
-    target_ra = target_star.ra 
-    target_dec = target_star.dec
-    
-    target_coord = SkyCoord(target_ra, target_dec, unit=u.deg)
-    
-    times = []
-    fluxes = []
-    
     csv_files = sorted(Path(csv_dir).glob("*.csv"))
-    
+
+    store = open_store(csv_dir)
+    if len(store):
+        if csv_files:
+            print(f"Note: reading the result store in {csv_dir}; "
+                  f"ignoring {len(csv_files)} CSV files next to it")
+        if incremental:
+            print("Note: incremental=True has no effect on a result store")
+        return _load_store_light_curve(store, target_id, target_coord, max_sep_arcsec)
+
     if not csv_files:
         raise RuntimeError("No CSV files found.")
-    
-    for csv_file in csv_files:
-        df = pd.read_csv(csv_file)
-        
-        # Build coordinates for detected sources in this frame
-        coords = SkyCoord(df["RA"].values, df["DEC"].values, unit=u.deg)
-        
-        seps = target_coord.separation(coords).arcsec
-        idx = np.argmin(seps)
-        
-        if seps[idx] > max_sep_arcsec:
-            continue  # target not detected in this frame
-        
-        flux = df.loc[idx, "flux"]
-        date_obs = df.loc[idx, "DATE-OBS"]
-        
-        jd = Time(date_obs, format="isot", scale="utc").jd
-        
-        fluxes.append(flux)
-        times.append(jd)
+
+    if incremental:
+        target_key = f"{target_id}:{target_star.ra:.7f}:{target_star.dec:.7f}:{max_sep_arcsec:g}"
+        df = _update_light_curve_index(
+            Path(csv_dir), csv_files, target_key,
+            lambda files: _extract_target_rows(files, target_id, target_coord, max_sep_arcsec, max_workers),
+        )
+    else:
+        df = _extract_target_rows(csv_files, target_id, target_coord, max_sep_arcsec, max_workers)
         
-    if not times:
+    if df.empty:
         raise RuntimeError("Target not found in any CSV file.")
-    
-    return np.array(times), np.array(fluxes)
+
+    # Label frames by FITS name, as the result store does.
+    df = df.assign(frame=df["frame"].str.replace(r"\.csv$", ".fits", regex=True))
+
+    return _light_curve_table(df)
+
+
+def _extract_target_rows(
+        csv_files: List[Path],
+        target_id: Optional[str],
+        target_coord: SkyCoord,
+        max_sep_arcsec: float,
+        max_workers: Optional[int] = None
+    ) -> pd.DataFrame:
+    """Read CSV files and return the target row of each, with ``jd``."""
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        frames = list(pool.map(_read_frame_csv, csv_files))
+
+    df = _match_target(_frames_to_table(frames), target_id, target_coord, max_sep_arcsec)
+    df["jd"] = Time(df["DATE-OBS"].to_numpy(dtype=str), format="isot", scale="utc").jd
+
+    return df
+
+
+def _update_light_curve_index(
+        csv_dir: Path,
+        csv_files: List[Path],
+        target_key: str,
+        extract
+    ) -> pd.DataFrame:
+    """
+    Return the target rows of ``csv_files``, parsing only unindexed files.
+
+    Files whose size or mtime differ from the index, or that are not in
+    it, are passed to ``extract``; the index is then rewritten with
+    their rows and without entries of deleted files.
+    """
+    index_path = csv_dir / LIGHT_CURVE_INDEX_FILE
+    if index_path.exists():
+        index = pd.read_csv(
+            index_path, sep="\t", dtype={"target": str, "file": str},
+            float_precision="round_trip",
+        )
+    else:
+        index = pd.DataFrame(columns=list(LIGHT_CURVE_INDEX_COLUMNS))
+
+    stats = [f.stat() for f in csv_files]
+    current = pd.DataFrame({
+        "file": [f.name for f in csv_files],
+        "size": np.array([st.st_size for st in stats], dtype=np.int64),
+        "mtime_ns": np.array([st.st_mtime_ns for st in stats], dtype=np.int64),
+    })
+
+    others = index[index["target"] != target_key]
+    known = index[index["target"] == target_key].drop_duplicates("file", keep="last")
+    known = current.merge(known, on=["file", "size", "mtime_ns"], how="inner")
+
+    stale = current[~current["file"].isin(known["file"])]
+    if len(stale) or len(known) != (index["target"] == target_key).sum():
+        if len(stale):
+            rows = extract([csv_dir / name for name in stale["file"]])
+            rows = rows.rename(columns={"frame": "file"})[["file", *LIGHT_CURVE_COLUMNS]]
+            added = stale.merge(rows, on="file", how="left").assign(target=target_key)
+            known = added if known.empty else pd.concat([known, added], ignore_index=True)
+
+        updated = pd.concat([others, known], ignore_index=True)[list(LIGHT_CURVE_INDEX_COLUMNS)]
+
+        tmp_path = index_path.with_name(index_path.name + ".tmp")
+        updated.to_csv(tmp_path, sep="\t", index=False)
+        os.replace(tmp_path, index_path)
+
+    # Files without the target are indexed with NaN rows.
+    found = known.dropna(subset=["jd"])
+
+    return found.rename(columns={"file": "frame"})
+
+
+def _read_frame_csv(csv_file: Path) -> Tuple[tuple, list]:
+    """
+    Read the header and rows of one per-frame CSV as strings.
+
+    Per-frame files hold a handful of rows, so the plain ``csv`` reader
+    is much cheaper than a ``pd.read_csv`` call per file; the columns are
+    converted once for all files in ``_frames_to_table``.
+    """
+    with open(csv_file, newline="") as f:
+        reader = csv.reader(f)
+        header = tuple(next(reader, ())) + ("frame",)
+        rows = [row + [csv_file.name] for row in reader if row]
+    return header, rows
+
+
+def _frames_to_table(frames: List[Tuple[tuple, list]]) -> pd.DataFrame:
+    """Concatenate the rows of many CSVs, grouped by header, into one table."""
+    by_header = {}
+    for header, rows in frames:
+        by_header.setdefault(header, []).extend(rows)
+
+    tables = []
+    for header, rows in by_header.items():
+        if not rows:
+            continue
+        df = pd.DataFrame(rows, columns=list(header))
+        for column in df.columns:
+            if column not in ("ID", "DATE-OBS", "frame"):
+                df[column] = pd.to_numeric(df[column], errors="coerce")
+        tables.append(df)
+
+    if not tables:
+        return pd.DataFrame(columns=["ID", "RA", "DEC", "DATE-OBS", "frame", *LIGHT_CURVE_COLUMNS[1:]])
+
+    return pd.concat(tables, ignore_index=True)
+
+
+def _match_target(
+        df: pd.DataFrame,
+        target_id: Optional[str],
+        target_coord: SkyCoord,
+        max_sep_arcsec: float
+    ) -> pd.DataFrame:
+    """
+    Keep the target's row of every frame in a multi-frame table.
+
+    Rows are matched by ``ID``; frames without the ID fall back to the
+    nearest source within ``max_sep_arcsec``, computed for all of them
+    with one ``separation`` call.
+    """
+    by_id = df.iloc[0:0]
+    if target_id is not None and "ID" in df.columns:
+        by_id = df[df["ID"].astype(str).to_numpy() == target_id].drop_duplicates("frame")
+
+    rest = df[~df["frame"].isin(by_id["frame"])]
+    if len(rest):
+        seps = target_coord.separation(
+            SkyCoord(rest["RA"].to_numpy(), rest["DEC"].to_numpy(), unit=u.deg)
+        ).arcsec
+        rest = rest.assign(_sep=seps)[seps <= max_sep_arcsec]
+        rest = rest.loc[rest.groupby("frame")["_sep"].idxmin()].drop(columns="_sep")
+
+    return pd.concat([by_id, rest])
+
+
+def _light_curve_table(df: pd.DataFrame) -> pd.DataFrame:
+    """Select the light-curve columns, indexed by frame and sorted by time."""
+    return df.set_index("frame")[list(LIGHT_CURVE_COLUMNS)].sort_values("jd", kind="stable")
+
+
+def _load_store_light_curve(
+        store,
+        target_id: Optional[str],
+        target_coord: SkyCoord,
+        max_sep_arcsec: float
+    ) -> pd.DataFrame:
+    """Target light curve from a result store, by Gaia ID or position."""
+    df = None
+    if target_id is not None:
+        df = store.read(source_ids=[target_id])
+
+    if df is None or df.empty:
+        df = store.read()
+
+    df = df.reset_index().rename(columns={"source_id": "ID"})
+    df = _match_target(df, target_id, target_coord, max_sep_arcsec)
+
+    if df.empty:
+        raise RuntimeError("Target not found in the result store.")
+
+    return _light_curve_table(df)
+
+
+def load_pointing_jitter(csv_dir: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Load the per-frame pointing offsets written in global astrometry mode.
+
+    Parameters
+    ----------
+    csv_dir : str
+        Directory containing per-frame CSV photometry files or a result
+        store produced with ``TessPhotometry(astrometry="global")``.
+
+    Returns
+    -------
+    times : numpy.ndarray
+        Observation times in Julian Date, sorted.
+    dx : numpy.ndarray
+        Fitted x offset of each frame in pixels.
+    dy : numpy.ndarray
+        Fitted y offset of each frame in pixels.
+
+    Raises
+    ------
+    RuntimeError
+        If no frame holds pointing columns.
+    """
+    store = open_store(csv_dir)
+    if len(store):
+        df = store.pointing()
+        if df.empty:
+            raise RuntimeError("No pointing offsets found.")
+        return df["jd"].to_numpy(), df["PTG_DX"].to_numpy(), df["PTG_DY"].to_numpy()
+
+    times = []
+    dx = []
+    dy = []
+
+    for csv_file in sorted(Path(csv_dir).glob("*.csv")):
+        df = pd.read_csv(csv_file, nrows=1)
+        if "PTG_DX" not in df.columns:
+            continue
+
+        times.append(df.loc[0, "DATE-OBS"])
+        dx.append(df.loc[0, "PTG_DX"])
+        dy.append(df.loc[0, "PTG_DY"])
+
+    if not times:
+        raise RuntimeError("No pointing offsets found.")
+
+    times = Time(times, format="isot", scale="utc").jd
+    order = np.argsort(times)
+
+    return times[order], np.array(dx)[order], np.array(dy)[order]
+
+
+# Number of frequencies of the fixed periodogram grid.
+DEFAULT_N_FREQUENCIES = 20000
+
+# Light curves with at least this many points use astropy's O(N log N)
+# "fast" Lomb-Scargle when method="auto"; shorter ones use the exact
+# "cython" implementation.
+FAST_METHOD_MIN_POINTS = 1000
+
+# Frequencies evaluated across each of the top peaks by refine_peaks.
+REFINE_SAMPLES = 41
+
+
+def frequency_grid(times: np.ndarray, min_period: float = 0.1, max_period: float = 10.0,
+                   grid: str = "fixed", samples_per_peak: float = 5.0,
+                   n_frequencies: int = DEFAULT_N_FREQUENCIES,
+                   max_frequencies: int = 2_000_000) -> np.ndarray:
+    """
+    Build a regular frequency grid between 1/max_period and 1/min_period.
+
+    Parameters
+    ----------
+    times : numpy.ndarray
+        Observation times in days.
+    min_period, max_period : float, optional
+        Period range in days.
+    grid : {"fixed", "adaptive"}, optional
+        ``"fixed"`` uses ``n_frequencies`` points whatever the data.
+        ``"adaptive"`` spaces the grid by ``1 / (samples_per_peak * T)``
+        for a time baseline ``T``, so every peak (width ~1/T) is sampled
+        ``samples_per_peak`` times.
+    samples_per_peak : float, optional
+        Oversampling factor of the adaptive grid.
+    n_frequencies : int, optional
+        Size of the fixed grid.
+    max_frequencies : int, optional
+        Upper bound on the adaptive grid size.
+
+    Returns
+    -------
+    numpy.ndarray
+        Frequencies in 1/day, increasing.
+    """
+    f_min, f_max = 1 / max_period, 1 / min_period
+
+    if grid == "fixed":
+        n = n_frequencies
+    elif grid == "adaptive":
+        baseline = float(np.ptp(times)) if len(times) > 1 else 0.0
+        if baseline <= 0:
+            n = n_frequencies
+        else:
+            df = 1 / (samples_per_peak * baseline)
+            n = int(np.ceil((f_max - f_min) / df)) + 1
+            n = min(max(n, 2), max_frequencies)
+    else:
+        raise ValueError(f"Unknown frequency grid '{grid}'")
+
+    return np.linspace(f_min, f_max, n)
+
+
+def top_peaks(power: np.ndarray, n_peaks: Optional[int] = 10) -> np.ndarray:
+    """
+    Indices of the highest local maxima of a periodogram, highest first.
+
+    Only the ``n_peaks`` best peaks are sorted, selected with
+    ``argpartition`` instead of ranking every local maximum. With
+    ``n_peaks=None`` every local maximum is returned.
+    """
+    peaks, _ = find_peaks(power)
+    if n_peaks is not None and len(peaks) > n_peaks:
+        peaks = peaks[np.argpartition(power[peaks], -n_peaks)[-n_peaks:]]
+    return peaks[np.argsort(power[peaks])[::-1]]
+
+
+def refine_peaks(ls: LombScargle, frequency: np.ndarray, peaks: np.ndarray,
+                 n_samples: int = REFINE_SAMPLES) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Locate periodogram peaks more finely than the search grid.
+
+    Each peak is re-evaluated with the exact method on ``n_samples``
+    frequencies spanning one grid step on either side, so a coarse
+    (adaptive) search grid does not limit the period accuracy.
+
+    Parameters
+    ----------
+    ls : astropy.timeseries.LombScargle
+        Periodogram of the light curve.
+    frequency : numpy.ndarray
+        Regular search grid the peaks were found on.
+    peaks : numpy.ndarray
+        Indices of the peaks in ``frequency``.
+    n_samples : int, optional
+        Frequencies evaluated per peak.
+
+    Returns
+    -------
+    periods : numpy.ndarray
+        Refined period of each peak in days.
+    power : numpy.ndarray
+        Power at the refined periods.
+    """
+    periods = np.empty(len(peaks))
+    power = np.empty(len(peaks))
+    if len(frequency) < 2:
+        periods[:] = 1 / frequency[peaks]
+        power[:] = ls.power(frequency[peaks], method="cython")
+        return periods, power
+
+    step = frequency[1] - frequency[0]
+    offsets = np.linspace(-step, step, n_samples)
+    for i, peak in enumerate(peaks):
+        window = frequency[peak] + offsets
+        window = window[window > 0]
+        window_power = ls.power(window, method="cython")
+        best = int(np.argmax(window_power))
+        periods[i] = 1 / window[best]
+        power[i] = window_power[best]
+
+    return periods, power
 
 
 def compute_periodogram(times: List[float], fluxes: List[float], 
-                       min_period: float = 0.1, max_period: float = 10.0) -> dict:
-    """Compute Lomb-Scargle periodogram"""
+                       min_period: float = 0.1, max_period: float = 10.0,
+                       grid: str = "fixed", samples_per_peak: float = 5.0,
+                       method: str = "auto", n_peaks: Optional[int] = None,
+                       n_refine: int = 10,
+                       significance: Optional[str] = None, n_resamples: int = 1000,
+                       seed: Optional[int] = 0, max_workers: Optional[int] = None) -> dict:
+    """
+    Compute Lomb-Scargle periodogram
+
+    Parameters
+    ----------
+    times, fluxes : array_like
+        Light curve; NaN fluxes are ignored.
+    min_period, max_period : float, optional
+        Period range in days.
+    grid : {"fixed", "adaptive"}, optional
+        Frequency grid, see ``frequency_grid``. The default is the
+        historical 20000-point grid. Either way the top peaks are
+        located on a finer local window, see ``refine_peaks``.
+    samples_per_peak : float, optional
+        Oversampling factor of the adaptive grid.
+    method : str, optional
+        ``LombScargle.power`` method. ``"auto"`` uses the approximate
+        O(N log N) ``"fast"`` method for light curves of at least
+        ``FAST_METHOD_MIN_POINTS`` points and the exact ``"cython"``
+        method otherwise. (Earlier versions left the choice to astropy,
+        which picks ``"fast"`` above 200 points on this regular grid, so
+        only 200-999 point light curves change, to the exact method.)
+        Pass ``"cython"`` for exact powers at any size.
+    n_peaks : int or None, optional
+        Number of highest peaks returned in ``'peaks'``; None (default)
+        returns every local maximum, as before.
+    n_refine : int, optional
+        Number of highest peaks located finely with ``refine_peaks``.
+    significance : {None, "bootstrap", "permutation"}, optional
+        Estimate the false-alarm probability of the highest peak by
+        resampling on the same grid, see
+        ``coltess.periodogram.bootstrap_significance``.
+    n_resamples : int, optional
+        Maximum number of resamples for ``significance``.
+    seed : int or None, optional
+        Root seed of the resampling.
+    max_workers : int or None, optional
+        Worker processes used for the resamples.
+
+    Returns
+    -------
+    dict
+        ``periods``, ``power``, ``frequency``, ``peaks`` (indices of the
+        peaks, highest first), ``peak_periods`` and ``peak_power`` (the
+        first ``n_refine`` peaks located finely with ``refine_peaks``),
+        ``method`` and, with at least two peaks, ``primary_period``,
+        ``secondary_period`` (both refined) and ``period_uncertainty``.
+        The latter is the FWHM estimate of
+        ``estimate_period_uncertainty`` for the secondary peak, measured
+        on the search grid, so it is only resolved to one grid step.
+        With ``significance`` also ``fap``, ``fap_error`` and
+        ``bootstrap`` (the full ``BootstrapSignificance``), whose
+        ``period_uncertainty`` is the bootstrap estimate for the primary
+        peak.
+    """
     times_array = np.array(times)
     fluxes_array = np.array(fluxes)
     
@@ -102,28 +581,47 @@ def compute_periodogram(times: List[float], fluxes: List[float],
     fluxes_array = fluxes_array[mask]
     
     # Compute periodogram
-    frequency = np.linspace(1/max_period, 1/min_period, 20000)
+    frequency = frequency_grid(times_array, min_period, max_period,
+                               grid=grid, samples_per_peak=samples_per_peak)
+    if method == "auto":
+        method = "fast" if len(times_array) >= FAST_METHOD_MIN_POINTS else "cython"
     ls = LombScargle(times_array, fluxes_array)
-    power = ls.power(frequency)
+    power = ls.power(frequency, method=method, assume_regular_frequency=True)
     periods = 1/frequency
     
     # Find peaks
-    peaks, _ = find_peaks(power)
-    sorted_peaks = sorted(peaks, key=lambda x: power[x], reverse=True)
+    sorted_peaks = top_peaks(power, n_peaks)
+    peak_periods, peak_power = refine_peaks(ls, frequency, sorted_peaks[:n_refine])
     
     results = {
         'periods': periods,
         'power': power,
-        'peaks': sorted_peaks
+        'frequency': frequency,
+        'peaks': sorted_peaks,
+        'peak_periods': peak_periods,
+        'peak_power': peak_power,
+        'method': method,
     }
     
     if len(sorted_peaks) >= 2:
-        results['primary_period'] = periods[sorted_peaks[0]]
-        results['secondary_period'] = periods[sorted_peaks[1]]
+        results['primary_period'] = peak_periods[0]
+        results['secondary_period'] = peak_periods[1]
         
         # Estimate uncertainty
         sigma_p = estimate_period_uncertainty(periods, power, sorted_peaks[1])
         results['period_uncertainty'] = sigma_p
+
+    if significance is not None:
+        from coltess.periodogram import bootstrap_significance
+
+        bootstrap = bootstrap_significance(
+            times_array, fluxes_array, frequency=frequency, method=method,
+            mode=significance, n_resamples=n_resamples, seed=seed,
+            max_workers=max_workers,
+        )
+        results['fap'] = bootstrap.fap
+        results['fap_error'] = bootstrap.fap_error
+        results['bootstrap'] = bootstrap
     
     return results
 
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Sparse-matrix aperture photometry.
+
+Within a CCD the pixel positions of catalog sources barely move between
+cadences, so the exact-overlap pixel weights of every aperture and
+annulus can be computed once and reused. The weights are stored as one
+sparse matrix and each frame's aperture sums are a single sparse
+matrix-vector product with the flattened image.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from photutils.aperture import CircularAperture, CircularAnnulus
+
+
+class SparseApertureEngine:
+    """
+    Cached sparse pixel weights for circular apertures and annuli.
+
+    The weight matrix has one row per aperture and one per annulus
+    (``2 * N`` rows for ``N`` sources) and one column per image pixel.
+    It is rebuilt only when the image shape or the number of sources
+    changes. Otherwise only the rows of sources that drifted more than
+    ``tolerance`` pixels from the positions their weights were computed
+    for are recomputed, so one noisy centroid does not invalidate the
+    weights of every other source. If more than ``rebuild_fraction`` of
+    the sources moved, e.g. after a pointing shift, the whole matrix is
+    rebuilt instead.
+
+    Parameters
+    ----------
+    aperture_radius : float
+        Radius of the circular photometric aperture in pixels.
+    annulus_inner : float
+        Inner radius of the background annulus in pixels.
+    annulus_outer : float
+        Outer radius of the background annulus in pixels.
+    tolerance : float, optional
+        Maximum position drift in pixels before the weights are rebuilt.
+    decimals : int, optional
+        Positions are rounded to this many decimals when the weights are
+        built, so nearly identical inputs share the same weights.
+    rebuild_fraction : float, optional
+        Fraction of moved sources above which the whole matrix is
+        rebuilt rather than updated row by row.
+    """
+
+    def __init__(
+            self,
+            aperture_radius: float,
+            annulus_inner: float,
+            annulus_outer: float,
+            tolerance: float = 0.05,
+            decimals: int = 2,
+            rebuild_fraction: float = 0.5,
+        ):
+        self.aperture_radius = aperture_radius
+        self.annulus_inner = annulus_inner
+        self.annulus_outer = annulus_outer
+        self.tolerance = tolerance
+        self.decimals = decimals
+        self.rebuild_fraction = rebuild_fraction
+
+        self.aperture_area = np.pi * aperture_radius**2
+        self.annulus_area = np.pi * (annulus_outer**2 - annulus_inner**2)
+
+        self._key: Optional[tuple] = None
+        self._positions: Optional[np.ndarray] = None
+        self._weights: Optional[sparse.csr_matrix] = None
+        self.n_builds = 0
+        self.n_updates = 0
+
+    def _moved_sources(self, positions: np.ndarray, shape: tuple) -> Optional[np.ndarray]:
+        """
+        Indices of the sources whose weights are stale.
+
+        Returns None if the whole matrix must be rebuilt.
+        """
+        key = (shape, len(positions), self.aperture_radius,
+               self.annulus_inner, self.annulus_outer)
+        if key != self._key or self._positions is None:
+            return None
+
+        drift = np.max(np.abs(positions - self._positions), axis=1)
+        moved = np.flatnonzero(drift > self.tolerance)
+        if len(moved) > self.rebuild_fraction * len(positions):
+            return None
+        return moved
+
+    def _row_entries(
+            self,
+            positions: np.ndarray,
+            indices: np.ndarray,
+            n_sources: int,
+            shape: tuple
+        ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Sparse (row, column, weight) entries of the given sources' apertures and annuli."""
+        nx = shape[1]
+
+        rows, cols, values = [], [], []
+        apertures = (
+            CircularAperture(positions, r=self.aperture_radius),
+            CircularAnnulus(positions, r_in=self.annulus_inner, r_out=self.annulus_outer),
+        )
+
+        for offset, aperture in zip((0, n_sources), apertures):
+            masks = aperture.to_mask(method="exact")
+            if not isinstance(masks, list):
+                masks = [masks]
+
+            for i, mask in zip(indices, masks):
+                slc_large, slc_small = mask.get_overlap_slices(shape)
+                if slc_large is None:
+                    continue
+
+                weights = mask.data[slc_small]
+                yy, xx = np.nonzero(weights)
+                yy_large = yy + slc_large[0].start
+                xx_large = xx + slc_large[1].start
+
+                rows.append(np.full(len(yy), offset + i, dtype=np.int64))
+                cols.append(yy_large * nx + xx_large)
+                values.append(weights[yy, xx])
+
+        if not rows:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0, dtype=np.float64)
+
+        return np.concatenate(rows), np.concatenate(cols), np.concatenate(values)
+
+    def _build(self, positions: np.ndarray, shape: tuple) -> None:
+        positions = np.round(positions, self.decimals)
+        n_sources = len(positions)
+        ny, nx = shape
+
+        rows, cols, values = self._row_entries(
+            positions, np.arange(n_sources), n_sources, shape
+        )
+
+        self._weights = sparse.csr_matrix(
+            (values, (rows, cols)), shape=(2 * n_sources, ny * nx)
+        )
+        self._positions = positions
+        self._key = (shape, n_sources, self.aperture_radius,
+                     self.annulus_inner, self.annulus_outer)
+        self.n_builds += 1
+
+    def _update(self, positions: np.ndarray, moved: np.ndarray) -> None:
+        """Recompute the aperture and annulus rows of the moved sources only."""
+        shape = self._key[0]
+        n_sources = len(positions)
+        new_positions = np.round(positions[moved], self.decimals)
+
+        stale = np.zeros(2 * n_sources, dtype=bool)
+        stale[moved] = True
+        stale[moved + n_sources] = True
+
+        old = self._weights.tocoo()
+        keep = ~stale[old.row]
+        rows, cols, values = self._row_entries(new_positions, moved, n_sources, shape)
+
+        self._weights = sparse.csr_matrix(
+            (
+                np.concatenate([old.data[keep], values]),
+                (np.concatenate([old.row[keep], rows]), np.concatenate([old.col[keep], cols])),
+            ),
+            shape=self._weights.shape,
+        )
+        self._positions[moved] = new_positions
+        self.n_updates += 1
+
+    def sums(
+            self,
+            image: np.ndarray,
+            positions: np.ndarray,
+            squares: bool = False
+        ) -> Tuple[np.ndarray, ...]:
+        """
+        Compute aperture and annulus sums at the given positions.
+
+        Parameters
+        ----------
+        image : numpy.ndarray
+            2D image.
+        positions : numpy.ndarray
+            Source ``(x, y)`` pixel positions, shape (N, 2).
+        squares : bool, optional
+            Also return the weighted sums of squared pixel values in each
+            annulus, for a local background noise estimate.
+
+        Returns
+        -------
+        aperture_sums : numpy.ndarray
+            Weighted pixel sums within each aperture.
+        annulus_sums : numpy.ndarray
+            Weighted pixel sums within each background annulus.
+        annulus_sumsq : numpy.ndarray
+            Weighted sums of squared pixel values within each annulus.
+            Only returned if ``squares`` is True.
+
+        Notes
+        -----
+        Non-finite pixels contribute zero, as they are masked by
+        ``photutils.aperture.aperture_photometry``.
+        """
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        if len(positions) == 0:
+            empty = np.empty(0, dtype=np.float64)
+            return (empty, empty, empty) if squares else (empty, empty)
+
+        moved = self._moved_sources(positions, image.shape)
+        if moved is None:
+            self._build(positions, image.shape)
+        elif len(moved):
+            self._update(positions, moved)
+
+        flat = np.asarray(image, dtype=np.float64).ravel()
+        if not np.all(np.isfinite(flat)):
+            flat = np.where(np.isfinite(flat), flat, 0.0)
+
+        totals = self._weights @ flat
+        n_sources = len(positions)
+
+        if squares:
+            annulus_sumsq = self._weights[n_sources:] @ (flat * flat)
+            return totals[:n_sources], totals[n_sources:], annulus_sumsq
+
+        return totals[:n_sources], totals[n_sources:]
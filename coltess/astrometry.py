@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Per-frame pointing solution from a few reference stars.
+
+Instead of centroiding every catalog source, a handful of bright,
+isolated reference stars are centroided and a global shift (optionally
+shift plus a small rotation) between their WCS-predicted and measured
+positions is fitted. The fitted offset is then applied to every source,
+so the centroiding cost per frame depends on the number of reference
+stars rather than the catalog size.
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+@dataclass
+class PointingOffset:
+    """
+    Fitted offset between WCS-predicted and measured pixel positions.
+
+    Measured positions are modelled as::
+
+        x' = x + dx - rotation * (y - y0)
+        y' = y + dy + rotation * (x - x0)
+
+    with ``rotation`` in radians (small-angle) about ``(x0, y0)``.
+    """
+
+    dx: float = 0.0
+    dy: float = 0.0
+    rotation: float = 0.0
+    x0: float = 0.0
+    y0: float = 0.0
+    n_used: int = 0
+
+    def apply(self, x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the positions ``(x, y)`` corrected by the offset."""
+        x_new = x + self.dx - self.rotation * (y - self.y0)
+        y_new = y + self.dy + self.rotation * (x - self.x0)
+        return x_new, y_new
+
+
+def select_reference_stars(
+        x: np.ndarray,
+        y: np.ndarray,
+        brightness: np.ndarray,
+        shape: tuple,
+        n_reference: int = 20,
+        isolation_radius: float = 5.0,
+        edge: float = 3.0
+    ) -> np.ndarray:
+    """
+    Pick bright, isolated sources to use as astrometric references.
+
+    Parameters
+    ----------
+    x, y : numpy.ndarray
+        Predicted pixel positions of all sources.
+    brightness : numpy.ndarray
+        Ranking value, larger is brighter (e.g. negative magnitude).
+    shape : tuple
+        Image shape ``(ny, nx)``.
+    n_reference : int, optional
+        Maximum number of references returned.
+    isolation_radius : float, optional
+        Sources with another source closer than this many pixels are
+        not used.
+    edge : float, optional
+        Minimum distance in pixels from the image edges.
+
+    Returns
+    -------
+    numpy.ndarray
+        Indices of the selected sources, brightest first.
+    """
+    n = len(x)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+
+    candidates = (
+        np.isfinite(brightness)
+        & (x >= edge) & (x < shape[1] - edge)
+        & (y >= edge) & (y < shape[0] - edge)
+    )
+
+    if n > 1:
+        points = np.column_stack([x, y])
+        distances, _ = cKDTree(points).query(points, k=2)
+        candidates &= distances[:, 1] > isolation_radius
+
+    idx = np.flatnonzero(candidates)
+    order = np.argsort(-brightness[idx], kind="stable")
+
+    return idx[order[:n_reference]]
+
+
+def fit_pointing_offset(
+        x_pred: np.ndarray,
+        y_pred: np.ndarray,
+        x_meas: np.ndarray,
+        y_meas: np.ndarray,
+        fit_rotation: bool = False,
+        min_stars: int = 3,
+        clip_sigma: float = 3.0
+    ) -> Optional[PointingOffset]:
+    """
+    Fit a global shift (and optionally rotation) to reference residuals.
+
+    Parameters
+    ----------
+    x_pred, y_pred : numpy.ndarray
+        WCS-predicted positions of the reference stars.
+    x_meas, y_meas : numpy.ndarray
+        Centroided positions; NaN entries are ignored.
+    fit_rotation : bool, optional
+        Also fit a small rotation about the references' mean position.
+    min_stars : int, optional
+        Minimum number of usable references.
+    clip_sigma : float, optional
+        Residual outliers beyond this many robust standard deviations
+        are rejected once before the final fit.
+
+    Returns
+    -------
+    PointingOffset or None
+        Fitted offset, or None if fewer than ``min_stars`` references
+        are usable.
+    """
+    ok = np.isfinite(x_meas) & np.isfinite(y_meas)
+    if ok.sum() < min_stars:
+        return None
+
+    x, y = x_pred[ok], y_pred[ok]
+    rx, ry = x_meas[ok] - x, y_meas[ok] - y
+
+    # Reject outliers (blends, cosmic rays) around the median shift.
+    r = np.hypot(rx - np.median(rx), ry - np.median(ry))
+    mad = 1.4826 * np.median(r)
+    if mad > 0:
+        keep = r <= clip_sigma * mad
+        if keep.sum() >= min_stars:
+            x, y, rx, ry = x[keep], y[keep], rx[keep], ry[keep]
+
+    x0, y0 = float(np.mean(x)), float(np.mean(y))
+
+    if not fit_rotation:
+        return PointingOffset(
+            dx=float(np.median(rx)), dy=float(np.median(ry)),
+            x0=x0, y0=y0, n_used=len(x),
+        )
+
+    n = len(x)
+    design = np.zeros((2 * n, 3))
+    design[:n, 0] = 1.0
+    design[n:, 1] = 1.0
+    design[:n, 2] = -(y - y0)
+    design[n:, 2] = x - x0
+    (dx, dy, rotation), *_ = np.linalg.lstsq(design, np.concatenate([rx, ry]), rcond=None)
+
+    return PointingOffset(
+        dx=float(dx), dy=float(dy), rotation=float(rotation),
+        x0=x0, y0=y0, n_used=n,
+    )
@@ -80,7 +80,7 @@ def query_gaia_catalog(star: StarData, radius_arcmin: float = 1.0) -> pd.DataFra
     radius_deg = radius_arcmin / 60.0
     
     query = f"""
-    SELECT ra, dec, source_id
+    SELECT ra, dec, source_id, phot_g_mean_mag
     FROM gaiadr3.gaia_source
     WHERE CONTAINS(POINT('ICRS', ra, dec), 
                    CIRCLE('ICRS', {ra}, {dec}, {radius_deg})) = 1
@@ -6,6 +6,11 @@ Core data structures for coltess.
 from dataclasses import dataclass, field
 from typing import Optional
 import numpy as np
+import pandas as pd
+from astropy.io import fits
+
+# Magnitude columns recognised by SourceCatalog.from_csv, in priority order.
+CATALOG_MAG_COLUMNS = ("phot_g_mean_mag", "mag")
 
 
 @dataclass
@@ -34,3 +39,160 @@ class StarData:
 
     def has_photometry(self) -> bool:
         return self.times is not None and self.fluxes is not None
+
+
+@dataclass(eq=False)
+class SourceCatalog:
+    """
+    Columnar source catalog backed by contiguous NumPy arrays.
+
+    Each attribute holds one column, and row ``i`` of every column
+    describes the same source. Positions are ICRS degrees stored as
+    float64, source identifiers as int64 (Gaia DR3 ids) or fixed-width
+    strings, and the optional magnitude as float64.
+
+    Selections return new catalogs, so the object can be passed around
+    and sliced without ever materializing per-source Python objects.
+    """
+
+    ra: np.ndarray
+    dec: np.ndarray
+    source_id: np.ndarray
+    mag: Optional[np.ndarray] = None
+
+    def __post_init__(self):
+        self.ra = np.ascontiguousarray(self.ra, dtype=np.float64)
+        self.dec = np.ascontiguousarray(self.dec, dtype=np.float64)
+        self.source_id = np.ascontiguousarray(_as_source_ids(self.source_id))
+        if self.mag is not None:
+            self.mag = np.ascontiguousarray(self.mag, dtype=np.float64)
+
+        n = len(self.ra)
+        columns = [self.dec, self.source_id]
+        if self.mag is not None:
+            columns.append(self.mag)
+        if any(len(col) != n for col in columns):
+            raise ValueError("All catalog columns must have the same length")
+
+    def __len__(self) -> int:
+        return len(self.ra)
+
+    def subset(self, selection) -> "SourceCatalog":
+        """
+        Return a new catalog with the selected rows.
+
+        Parameters
+        ----------
+        selection : array_like or slice
+            Boolean mask, integer index array or slice applied to every
+            column.
+
+        Returns
+        -------
+        SourceCatalog
+            Catalog restricted to the selected sources.
+        """
+        return SourceCatalog(
+            ra=self.ra[selection],
+            dec=self.dec[selection],
+            source_id=self.source_id[selection],
+            mag=None if self.mag is None else self.mag[selection],
+        )
+
+    def index_of(self, source_id) -> Optional[int]:
+        """
+        Return the row index of a source identifier.
+
+        Parameters
+        ----------
+        source_id : int or str
+            Identifier to look up, e.g. ``StarData.gaia_id``. It is
+            converted to the dtype of the ``source_id`` column first.
+
+        Returns
+        -------
+        int or None
+            Index of the first matching row, or None if the identifier is
+            not in the catalog.
+        """
+        try:
+            key = np.asarray(source_id).astype(self.source_id.dtype)
+        except (TypeError, ValueError, OverflowError):
+            return None
+
+        rows = np.flatnonzero(self.source_id == key)
+        return int(rows[0]) if len(rows) else None
+
+    @classmethod
+    def from_csv(cls, catalog_file: str) -> "SourceCatalog":
+        """
+        Load a catalog from a CSV file.
+
+        Parameters
+        ----------
+        catalog_file : str
+            Path to a CSV file with at least `ra`, `dec` and `source_id`
+            columns in degrees (ICRS). A `phot_g_mean_mag` (or `mag`)
+            column is loaded as the catalog magnitude when present.
+
+        Returns
+        -------
+        SourceCatalog
+            Catalog with one row per CSV line.
+        """
+        header = pd.read_csv(catalog_file, nrows=0).columns
+        mag_column = next(
+            (name for name in CATALOG_MAG_COLUMNS if name in header), None
+        )
+
+        usecols = ["ra", "dec", "source_id"]
+        if mag_column is not None:
+            usecols.append(mag_column)
+
+        df = pd.read_csv(
+            catalog_file,
+            usecols=usecols,
+            dtype={"ra": np.float64, "dec": np.float64, "source_id": str},
+        )
+
+        return cls(
+            ra=df["ra"].to_numpy(),
+            dec=df["dec"].to_numpy(),
+            source_id=df["source_id"].to_numpy(),
+            mag=None if mag_column is None else df[mag_column].to_numpy(dtype=np.float64),
+        )
+
+
+def _as_source_ids(values) -> np.ndarray:
+    """Convert source identifiers to int64, or fixed-width strings if needed."""
+    values = np.asarray(values)
+    if values.dtype.kind in "iu":
+        return values.astype(np.int64, copy=False)
+    if values.dtype.kind in "US":
+        return values
+    try:
+        return values.astype(np.int64)
+    except (TypeError, ValueError, OverflowError):
+        return values.astype(str)
+
+
+@dataclass(eq=False)
+class FrameCutout:
+    """
+    Rectangular piece of a TESS FFI together with its full-frame header.
+
+    The header (and therefore the WCS) describes the whole frame; the
+    cutout's pixel ``(0, 0)`` corresponds to pixel ``(x0, y0)`` of the
+    full image.
+    """
+
+    image: np.ndarray
+    header: fits.Header = field(repr=False)
+    x0: int = 0
+    y0: int = 0
+    filename: str = ""
+
+    @property
+    def frame_shape(self) -> tuple:
+        """Shape ``(ny, nx)`` of the full frame the cutout was taken from."""
+        return (self.header["NAXIS2"], self.header["NAXIS1"])
@@ -5,16 +5,81 @@ for certain sector and imaes.
 """
 
 import os
+import re
+from array import array
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Set, Tuple
 
-from coltess.core import StarData
+from coltess.core import StarData, FrameCutout
 
 import astropy.units as u
+from astropy.io import fits
+from astropy.wcs import WCS
 from astropy.coordinates import SkyCoord
 from astroquery.mast import Tesscut
 
 import requests
-import subprocess
+import requests.adapters
+
+# FFI file names encode the cadence timestamp, sector, camera and CCD, e.g.
+# tess2018338165938-s0005-1-4-0125-s_ffic.fits
+FFI_FILENAME_PATTERN = re.compile(
+    r"tess(?P<timestamp>\d{13})-s(?P<sector>\d{4})-(?P<camera>\d)-(?P<ccd>\d)"
+    r"-\d{4}-[a-z]_ffic\.fits"
+)
+
+# FITS files are made of 2880-byte blocks holding 80-byte header cards.
+FITS_BLOCK_SIZE = 2880
+FITS_CARD_SIZE = 80
+
+# On-disk (big-endian) dtypes of FITS image data by BITPIX.
+FITS_BITPIX_DTYPES = {
+    8: "u1",
+    16: ">i2",
+    32: ">i4",
+    64: ">i8",
+    -32: ">f4",
+    -64: ">f8",
+}
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    """
+    One FFI download listed in a sector script.
+
+    Attributes
+    ----------
+    index : int
+        Line index of the entry in the script file.
+    command : str
+        Original curl command line.
+    url : str
+        Download URL of the FFI.
+    filename : str
+        FITS file name written by the command.
+    timestamp : str
+        Cadence timestamp (``YYYYDDDHHMMSS``) from the file name.
+    sector : int
+        TESS sector number.
+    camera : int
+        Camera number (1-4).
+    ccd : int
+        CCD number (1-4).
+    """
+
+    index: int
+    command: str
+    url: str
+    filename: str
+    timestamp: str
+    sector: int
+    camera: int
+    ccd: int
 
 def get_tess_sectors(target_star: StarData) -> pd.DataFrame:
     """
@@ -69,6 +134,770 @@ def download_tess_sector_script(sector: int) -> str:
     
     return script_name
 
+def parse_script_line(line: str, index: int = -1) -> Optional[ManifestEntry]:
+    """
+    Parse one line of a TESS sector download script.
+
+    Parameters
+    ----------
+    line : str
+        Script line, usually ``curl ... -o <file> <url>``.
+    index : int, optional
+        Line index stored in the returned entry.
+
+    Returns
+    -------
+    ManifestEntry or None
+        Parsed entry, or None for lines that do not download an FFI
+        (shebang, comments, blank lines).
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+
+    url = line.split()[-1]
+    match = FFI_FILENAME_PATTERN.search(url)
+    if match is None:
+        return None
+
+    return ManifestEntry(
+        index=index,
+        command=line,
+        url=url,
+        filename=match.group(0),
+        timestamp=match.group("timestamp"),
+        sector=int(match.group("sector")),
+        camera=int(match.group("camera")),
+        ccd=int(match.group("ccd")),
+    )
+
+
+def parse_sector_script(script_path: str) -> List[ManifestEntry]:
+    """
+    Parse a TESS sector download script into manifest entries.
+
+    Parameters
+    ----------
+    script_path : str
+        Path to the TESS download shell script.
+
+    Returns
+    -------
+    list of ManifestEntry
+        One entry per FFI line, in script order. Entries keep their
+        original line index.
+    """
+    entries = []
+    with open(script_path, "r") as f:
+        for index, line in enumerate(f):
+            entry = parse_script_line(line, index)
+            if entry is not None:
+                entries.append(entry)
+
+    return entries
+
+
+class ScriptIndex:
+    """
+    Random-access reader over the lines of a sector download script.
+
+    The file is scanned once to record the byte offset of every line;
+    individual lines are then read with a single seek. Only the offsets
+    are kept in memory, so scripts of any size can be indexed.
+
+    Parameters
+    ----------
+    script_path : str
+        Path to the TESS download shell script.
+    """
+
+    def __init__(self, script_path: str):
+        self.script_path = script_path
+        self._offsets = array("q")
+
+        offset = 0
+        with open(script_path, "rb") as f:
+            for line in f:
+                self._offsets.append(offset)
+                offset += len(line)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getitem__(self, index: int) -> str:
+        return self.line(index)
+
+    def line(self, index: int) -> str:
+        """
+        Return one stripped script line.
+
+        Parameters
+        ----------
+        index : int
+            Line index in the script file.
+
+        Returns
+        -------
+        str
+            Line content without surrounding whitespace.
+        """
+        if index < 0:
+            index += len(self._offsets)
+        if not 0 <= index < len(self._offsets):
+            raise IndexError(f"Script line {index} out of range")
+
+        with open(self.script_path, "rb") as f:
+            f.seek(self._offsets[index])
+            return f.readline().decode().strip()
+
+    def entry(self, index: int) -> Optional[ManifestEntry]:
+        """
+        Return the parsed manifest entry of one script line.
+
+        Parameters
+        ----------
+        index : int
+            Line index in the script file.
+
+        Returns
+        -------
+        ManifestEntry or None
+            Parsed entry, or None if the line is not an FFI download.
+        """
+        return parse_script_line(self.line(index), index)
+
+
+def filter_manifest(
+        entries: Iterable[ManifestEntry],
+        ccds: Iterable[Tuple[int, int]]
+    ) -> List[ManifestEntry]:
+    """
+    Keep only the manifest entries recorded by the given cameras/CCDs.
+
+    Parameters
+    ----------
+    entries : iterable of ManifestEntry
+        Parsed script entries.
+    ccds : iterable of tuple
+        Allowed ``(camera, ccd)`` pairs.
+
+    Returns
+    -------
+    list of ManifestEntry
+        Entries whose camera/CCD is in ``ccds``.
+    """
+    ccds = set(ccds)
+    return [e for e in entries if (e.camera, e.ccd) in ccds]
+
+
+def find_target_ccds(
+        target_star: StarData,
+        sector: int,
+        sectors=None
+    ) -> Set[Tuple[int, int]]:
+    """
+    Find the camera/CCD pairs that observe a target in a sector.
+
+    Parameters
+    ----------
+    target_star : StarData
+        StarData with right acension and declination.
+    sector : int
+        TESS sector number.
+    sectors : table, optional
+        Output of ``get_tess_sectors``. Queried from TESScut if not given.
+
+    Returns
+    -------
+    set of tuple
+        ``(camera, ccd)`` pairs covering the target in ``sector``.
+    """
+    if sectors is None:
+        sectors = get_tess_sectors(target_star)
+
+    return {
+        (int(camera), int(ccd))
+        for sec, camera, ccd in zip(sectors["sector"], sectors["camera"], sectors["ccd"])
+        if int(sec) == sector
+    }
+
+
+def probe_target_ccds(
+        target_star: StarData,
+        entries: Iterable[ManifestEntry]
+    ) -> Optional[Set[Tuple[int, int]]]:
+    """
+    Find the camera/CCD pairs that observe a target using probe frames.
+
+    The image header of one FFI per camera/CCD is fetched with HTTP Range
+    requests and the target position is tested against its WCS.
+
+    Parameters
+    ----------
+    target_star : StarData
+        StarData with right acension and declination.
+    entries : iterable of ManifestEntry
+        Parsed script entries for a single sector.
+
+    Returns
+    -------
+    set of tuple or None
+        ``(camera, ccd)`` pairs whose probe frame contains the target,
+        possibly empty. None if no probe header could be read.
+    """
+    # Imported here to keep the download module free of photutils at import.
+    from coltess.photometry import footprint_contains
+
+    probes = {}
+    for entry in entries:
+        probes.setdefault((entry.camera, entry.ccd), entry)
+
+    ccds = set()
+    n_read = 0
+    for key, entry in sorted(probes.items()):
+        try:
+            header, _ = fetch_fits_header(entry.url, ext=1)
+        except Exception as e:
+            print(f"Could not read probe frame {entry.filename}: {e}")
+            continue
+
+        n_read += 1
+        if footprint_contains(header, target_star.ra, target_star.dec)[0]:
+            ccds.add(key)
+
+    return ccds if n_read else None
+
+
+def select_target_ccds(
+        target_star: StarData,
+        entries: List[ManifestEntry]
+    ) -> Optional[Set[Tuple[int, int]]]:
+    """
+    Select the camera/CCD pairs of a sector script that can hold a target.
+
+    TESScut is queried first. If it fails or returns nothing for the
+    sector, the header of one probe frame per camera/CCD is checked
+    instead.
+
+    Parameters
+    ----------
+    target_star : StarData
+        StarData with right acension and declination.
+    entries : list of ManifestEntry
+        Parsed script entries for a single sector.
+
+    Returns
+    -------
+    set of tuple or None
+        ``(camera, ccd)`` pairs to keep. Empty if the probes show the
+        target on none of them. None if the footprint could not be
+        determined and no filtering should be applied.
+    """
+    if not entries:
+        return None
+
+    sector = entries[0].sector
+
+    try:
+        ccds = find_target_ccds(target_star, sector)
+    except Exception as e:
+        print(f"TESScut sector lookup failed ({e}), probing frames instead")
+        ccds = set()
+
+    if not ccds:
+        ccds = probe_target_ccds(target_star, entries)
+
+    return ccds
+
+
+@dataclass
+class DownloadResult:
+    """
+    Outcome of a single file download.
+
+    Attributes
+    ----------
+    url : str
+        Requested URL.
+    path : str
+        Destination path of the file.
+    ok : bool
+        True if the file was downloaded completely.
+    status : int or None
+        HTTP status code of the last response, if any.
+    nbytes : int
+        Size of the file on disk after the download.
+    attempts : int
+        Number of requests made.
+    error : str or None
+        Description of the last error for failed downloads.
+    """
+
+    url: str
+    path: str
+    ok: bool
+    status: Optional[int] = None
+    nbytes: int = 0
+    attempts: int = 0
+    error: Optional[str] = None
+
+
+class DownloadEngine:
+    """
+    Pooled HTTP downloader for TESS FFIs.
+
+    All requests go through one ``requests.Session`` so TCP/TLS
+    connections are kept alive and reused between files. Failed
+    transfers are retried with exponential backoff and resumed with
+    ``Range`` requests from the partial file left on disk.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        Number of concurrent downloads in ``download_many``; also the
+        size of the connection pool.
+    retries : int, optional
+        Number of retries after the first attempt.
+    backoff : float, optional
+        Base delay in seconds; attempt ``n`` waits ``backoff * 2**(n-1)``.
+    timeout : float, optional
+        Connect/read timeout in seconds for each request.
+    chunk_size : int, optional
+        Size in bytes of the chunks streamed to disk.
+    session : requests.Session, optional
+        Session to use instead of creating a new one.
+    """
+
+    # Status codes worth retrying; any other error status fails at once.
+    RETRY_STATUS = (408, 429, 500, 502, 503, 504)
+
+    def __init__(
+            self,
+            max_workers: int = 4,
+            retries: int = 3,
+            backoff: float = 1.0,
+            timeout: float = 60.0,
+            chunk_size: int = 1 << 20,
+            session: Optional[requests.Session] = None,
+        ):
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=max_workers,
+                pool_maxsize=max_workers,
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        """Close the pooled connections."""
+        self.session.close()
+
+    def download(self, url: str, output_path: str) -> DownloadResult:
+        """
+        Download one URL to a file.
+
+        Data is streamed to ``output_path + ".part"`` and renamed once
+        complete, so a path that exists is always a whole file.
+
+        Parameters
+        ----------
+        url : str
+            URL to download.
+        output_path : str
+            Destination file path.
+
+        Returns
+        -------
+        DownloadResult
+            Success flag, status and size of the download.
+        """
+        part_path = output_path + ".part"
+        result = DownloadResult(url=url, path=output_path, ok=False)
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            result.attempts = attempt + 1
+
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+            try:
+                with self.session.get(
+                    url, headers=headers, stream=True, timeout=self.timeout
+                ) as response:
+                    result.status = response.status_code
+
+                    if response.status_code == 416:
+                        # Stale partial file larger than the remote one.
+                        os.remove(part_path)
+                        result.error = "HTTP 416 on resume, restarting"
+                        continue
+                    if response.status_code in self.RETRY_STATUS:
+                        result.error = f"HTTP {response.status_code}"
+                        continue
+                    if response.status_code >= 400:
+                        result.error = f"HTTP {response.status_code}"
+                        break
+
+                    # A 200 to a Range request means the server sent the
+                    # whole file again.
+                    mode = "ab" if response.status_code == 206 else "wb"
+                    if mode == "wb":
+                        offset = 0
+
+                    expected = response.headers.get("Content-Length")
+                    written = 0
+                    with open(part_path, mode) as f:
+                        for chunk in response.iter_content(self.chunk_size):
+                            f.write(chunk)
+                            written += len(chunk)
+
+                if expected is not None and written != int(expected):
+                    result.error = f"Incomplete transfer ({written}/{expected} bytes)"
+                    continue
+
+                os.replace(part_path, output_path)
+                result.ok = True
+                result.error = None
+                result.nbytes = offset + written
+                return result
+
+            except (requests.RequestException, OSError) as e:
+                result.error = str(e)
+
+        if os.path.exists(part_path) and result.status is not None and 400 <= result.status < 500:
+            os.remove(part_path)
+
+        return result
+
+    def fetch_range(self, url: str, start: int, stop: int) -> bytes:
+        """
+        Fetch the bytes ``[start, stop)`` of a remote file.
+
+        Parameters
+        ----------
+        url : str
+            URL of the file.
+        start : int
+            Offset of the first byte.
+        stop : int
+            Offset one past the last byte.
+
+        Returns
+        -------
+        bytes
+            Requested bytes. Fewer are returned if the file ends before
+            ``stop``.
+
+        Raises
+        ------
+        RuntimeError
+            If the request still fails after all retries.
+
+        Notes
+        -----
+        Servers that ignore ``Range`` and answer 200 are still handled:
+        the body is streamed only up to ``stop`` and the connection is
+        then dropped.
+        """
+        headers = {"Range": f"bytes={start}-{stop - 1}"}
+        error = None
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+
+            try:
+                with self.session.get(
+                    url, headers=headers, stream=True, timeout=self.timeout
+                ) as response:
+                    if response.status_code == 206:
+                        return response.content
+                    if response.status_code == 416:
+                        return b""
+                    if response.status_code == 200:
+                        data = bytearray()
+                        for chunk in response.iter_content(self.chunk_size):
+                            data += chunk
+                            if len(data) >= stop:
+                                break
+                        return bytes(data[start:stop])
+
+                    error = f"HTTP {response.status_code}"
+                    if response.status_code not in self.RETRY_STATUS:
+                        break
+
+            except requests.RequestException as e:
+                error = str(e)
+
+        raise RuntimeError(f"Range request {start}-{stop - 1} failed for {url}: {error}")
+
+    def download_many(
+            self,
+            jobs: Iterable[Tuple[str, str]]
+        ) -> List[DownloadResult]:
+        """
+        Download several files concurrently over the pooled session.
+
+        Parameters
+        ----------
+        jobs : iterable of tuple
+            ``(url, output_path)`` pairs.
+
+        Returns
+        -------
+        list of DownloadResult
+            One result per job, in input order.
+        """
+        jobs = list(jobs)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(lambda job: self.download(*job), jobs))
+
+
+# One engine per process; rebuilt after fork so connections are not shared.
+_engine: Optional[DownloadEngine] = None
+_engine_pid: Optional[int] = None
+
+
+def get_download_engine() -> DownloadEngine:
+    """
+    Return the process-wide download engine, creating it if needed.
+
+    Returns
+    -------
+    DownloadEngine
+        Engine owned by the calling process.
+    """
+    global _engine, _engine_pid
+
+    if _engine is None or _engine_pid != os.getpid():
+        _engine = DownloadEngine()
+        _engine_pid = os.getpid()
+
+    return _engine
+
+
+def command_url(shell_command: str) -> str:
+    """
+    Extract the download URL from a sector script curl command.
+
+    Parameters
+    ----------
+    shell_command : str
+        Script line, ``curl ... <url>``.
+
+    Returns
+    -------
+    str
+        The URL (last token of the command).
+    """
+    return shell_command.split()[-1]
+
+
+def download_ffi(
+        entry: ManifestEntry,
+        output_dir: str,
+        engine: Optional[DownloadEngine] = None
+    ) -> DownloadResult:
+    """
+    Download the FFI of a manifest entry.
+
+    Parameters
+    ----------
+    entry : ManifestEntry
+        Parsed script entry.
+    output_dir : str
+        Directory where the FITS file will be written.
+    engine : DownloadEngine, optional
+        Engine to use. Defaults to the process-wide engine.
+
+    Returns
+    -------
+    DownloadResult
+        Outcome of the download.
+    """
+    if engine is None:
+        engine = get_download_engine()
+
+    return engine.download(entry.url, os.path.join(output_dir, entry.filename))
+
+
+def _header_end(data: bytes) -> Optional[int]:
+    """Return the block-aligned end of the FITS header at the start of ``data``."""
+    n_blocks = len(data) // FITS_BLOCK_SIZE
+    for block in range(n_blocks):
+        for card in range(0, FITS_BLOCK_SIZE, FITS_CARD_SIZE):
+            start = block * FITS_BLOCK_SIZE + card
+            if data[start:start + FITS_CARD_SIZE].rstrip() == b"END":
+                return (block + 1) * FITS_BLOCK_SIZE
+    return None
+
+
+def _hdu_data_size(header: fits.Header) -> int:
+    """Return the padded size in bytes of the data unit described by a header."""
+    naxis = header.get("NAXIS", 0)
+    if naxis == 0:
+        return 0
+
+    n_values = 1
+    for axis in range(1, naxis + 1):
+        n_values *= header[f"NAXIS{axis}"]
+
+    size = abs(header["BITPIX"]) // 8 * header.get("GCOUNT", 1) * (header.get("PCOUNT", 0) + n_values)
+
+    return -(-size // FITS_BLOCK_SIZE) * FITS_BLOCK_SIZE
+
+
+def fetch_fits_header(
+        url: str,
+        ext: int = 1,
+        engine: Optional[DownloadEngine] = None,
+        chunk_blocks: int = 16
+    ) -> Tuple[fits.Header, int]:
+    """
+    Read one HDU header of a remote FITS file with HTTP Range requests.
+
+    Only the header blocks of the HDUs up to ``ext`` are transferred;
+    data units in between are skipped using their sizes in the headers.
+
+    Parameters
+    ----------
+    url : str
+        URL of the FITS file.
+    ext : int, optional
+        Index of the HDU whose header is returned.
+    engine : DownloadEngine, optional
+        Engine to use. Defaults to the process-wide engine.
+    chunk_blocks : int, optional
+        Number of 2880-byte blocks requested at a time.
+
+    Returns
+    -------
+    header : astropy.io.fits.Header
+        Header of HDU ``ext``.
+    data_offset : int
+        Byte offset of the HDU's data unit in the file.
+    """
+    if engine is None:
+        engine = get_download_engine()
+
+    chunk = chunk_blocks * FITS_BLOCK_SIZE
+    buf, base = b"", 0
+    offset = 0
+
+    for _ in range(ext + 1):
+        # Reuse bytes already fetched when the next header follows directly.
+        if base <= offset <= base + len(buf):
+            buf, base = buf[offset - base:], offset
+        else:
+            buf, base = b"", offset
+
+        end = _header_end(buf)
+        while end is None:
+            more = engine.fetch_range(url, base + len(buf), base + len(buf) + chunk)
+            if not more:
+                raise RuntimeError(f"Truncated FITS header in {url}")
+            buf += more
+            end = _header_end(buf)
+
+        header = fits.Header.fromstring(buf[:end].decode("ascii"))
+        data_offset = base + end
+        offset = data_offset + _hdu_data_size(header)
+
+    return header, data_offset
+
+
+def fetch_ffi_cutout(
+        url: str,
+        ra: float,
+        dec: float,
+        radius: int,
+        engine: Optional[DownloadEngine] = None,
+        filename: Optional[str] = None
+    ) -> Optional[FrameCutout]:
+    """
+    Fetch a square cutout around a sky position from a remote FFI.
+
+    The image header is read first to locate the position with its WCS.
+    Only the byte range of the image rows covering the cutout is then
+    downloaded; with a 20 pixel radius this is a few hundred kilobytes
+    instead of the full ~35 MB file.
+
+    Parameters
+    ----------
+    url : str
+        URL of the FFI.
+    ra, dec : float
+        Cutout center in degrees (ICRS).
+    radius : int
+        Half-width of the cutout in pixels.
+    engine : DownloadEngine, optional
+        Engine to use. Defaults to the process-wide engine.
+    filename : str, optional
+        Name stored in the cutout. Defaults to the last URL component.
+
+    Returns
+    -------
+    FrameCutout or None
+        The cutout, or None if the position is not on the image.
+    """
+    if engine is None:
+        engine = get_download_engine()
+
+    header, data_offset = fetch_fits_header(url, ext=1, engine=engine)
+
+    if header.get("XTENSION", "").strip() != "IMAGE" or header.get("NAXIS") != 2:
+        raise RuntimeError(f"Extension 1 of {url} is not an uncompressed 2D image")
+
+    nx, ny = header["NAXIS1"], header["NAXIS2"]
+    x, y = WCS(header).all_world2pix([ra], [dec], 0, quiet=True)
+    x, y = float(x[0]), float(y[0])
+
+    if not (np.isfinite(x) and np.isfinite(y) and 0 <= x < nx and 0 <= y < ny):
+        return None
+
+    xc, yc = int(round(x)), int(round(y))
+    x0, x1 = max(xc - radius, 0), min(xc + radius + 1, nx)
+    y0, y1 = max(yc - radius, 0), min(yc + radius + 1, ny)
+
+    # Rows are contiguous on disk, so one range covers rows y0..y1-1.
+    dtype = np.dtype(FITS_BITPIX_DTYPES[header["BITPIX"]])
+    row_bytes = nx * dtype.itemsize
+    raw = engine.fetch_range(
+        url, data_offset + y0 * row_bytes, data_offset + y1 * row_bytes
+    )
+    if len(raw) != (y1 - y0) * row_bytes:
+        raise RuntimeError(f"Short read for image rows {y0}-{y1 - 1} of {url}")
+
+    rows = np.frombuffer(raw, dtype=dtype).reshape(y1 - y0, nx)
+    image = rows[:, x0:x1].astype(dtype.newbyteorder("="))
+
+    bscale = header.get("BSCALE", 1.0)
+    bzero = header.get("BZERO", 0.0)
+    if bscale != 1.0 or bzero != 0.0:
+        image = image * bscale + bzero
+
+    if filename is None:
+        filename = os.path.basename(url)
+
+    return FrameCutout(image=image, header=header, x0=x0, y0=y0, filename=filename)
+
+
 def download_tess_image(
         shell_command: str, 
         output_dir: str
@@ -76,6 +905,9 @@ def download_tess_image(
     """
     Download a single TESS FFI using the passed shell command.
 
+    The URL is taken from the command and fetched with the process-wide
+    ``DownloadEngine``; curl is no longer spawned.
+
     Parameters
     ----------
     shell_command : str 
@@ -86,16 +918,18 @@ def download_tess_image(
     Returns 
     -------
     str 
-        Path to the downloaded FITS file.
+        Path to the downloaded FITS file. The file does not exist if the
+        download failed.
     """
-    filename = os.path.basename(shell_command.split()[-1])
+    url = command_url(shell_command)
+    filename = os.path.basename(url)
     output_path = os.path.join(output_dir, filename)
 
-    cmd = f"{shell_command} -o {output_path}"
-    #print(cmd)
-    subprocess.run(cmd, shell=True, stdout=subprocess.DEVNULL, 
-                  stderr=subprocess.DEVNULL, cwd=output_dir)
-    
+    os.makedirs(output_dir, exist_ok=True)
+    result = get_download_engine().download(url, output_path)
+    if not result.ok:
+        print(f"[PID {os.getpid()}] Download failed for {filename}: {result.error}")
+
     return output_path
 
 
@@ -121,16 +955,17 @@ def download_tess_images(
     
     Notes
     -----
-    This function executes shell commands and suppresses stdout/stderr.
-    It is safe to call concurrently for non-overlapping index ranges.
+    Downloads reuse the process-wide HTTP session. It is safe to call
+    concurrently for non-overlapping index ranges.
     """
     os.makedirs(output_dir, exist_ok=True)
-    
-    with open(script_path, "r") as f:
-        lines = [line.strip() for line in f]
-    
+
+    index = ScriptIndex(script_path)
+
     # Get the requested range
-    download_lines = lines[start_idx:start_idx + num_images]
-    
-    for i, line in enumerate(download_lines, 1):
-        download_tess_image(line, output_dir)        
+    stop_idx = min(start_idx + num_images, len(index))
+
+    for i in range(start_idx, stop_idx):
+        entry = index.entry(i)
+        if entry is not None:
+            download_tess_image(entry.command, output_dir)        
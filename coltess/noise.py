@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Frame noise estimators for the photometric error model.
+
+The flux uncertainty only needs the standard deviation of the sky, and
+iterative sigma clipping of a full 4M-pixel FFI is far more work than
+that requires. The estimators below trade a full clipped pass for a
+subsample of the pixels.
+"""
+
+import numpy as np
+
+from astropy.stats import sigma_clipped_stats
+
+# Scale factor turning a median absolute deviation into a Gaussian sigma.
+MAD_TO_SIGMA = 1.482602218505602
+
+
+def noise_sigma_clip(image: np.ndarray, sigma: float = 3.0) -> float:
+    """
+    Sigma-clipped standard deviation of the full image.
+
+    Parameters
+    ----------
+    image : numpy.ndarray
+        2D image.
+    sigma : float, optional
+        Clipping threshold in standard deviations.
+
+    Returns
+    -------
+    float
+        Clipped standard deviation.
+    """
+    _, _, std = sigma_clipped_stats(image, sigma=sigma)
+    return float(std)
+
+
+def noise_strided(image: np.ndarray, stride: int = 8, sigma: float = 3.0) -> float:
+    """
+    Sigma-clipped standard deviation of a regular pixel subsample.
+
+    Only every ``stride``-th row and column is used, so the clipped
+    statistics run on ``1 / stride**2`` of the pixels.
+
+    Parameters
+    ----------
+    image : numpy.ndarray
+        2D image.
+    stride : int, optional
+        Step between sampled rows and columns.
+    sigma : float, optional
+        Clipping threshold in standard deviations.
+
+    Returns
+    -------
+    float
+        Clipped standard deviation of the subsample.
+    """
+    _, _, std = sigma_clipped_stats(image[::stride, ::stride], sigma=sigma)
+    return float(std)
+
+
+def noise_mad(image: np.ndarray, n_samples: int = 100_000, seed: int = 0) -> float:
+    """
+    Robust standard deviation from the MAD of random pixels.
+
+    Parameters
+    ----------
+    image : numpy.ndarray
+        2D image.
+    n_samples : int, optional
+        Number of randomly drawn pixels. The whole image is used if it is
+        smaller.
+    seed : int, optional
+        Seed of the pixel sample, fixed so results are reproducible.
+
+    Returns
+    -------
+    float
+        ``1.4826 * median(|p - median(p)|)`` over the finite sampled pixels,
+        NaN if none are finite.
+    """
+    flat = np.asarray(image).ravel()
+    if flat.size > n_samples:
+        rng = np.random.default_rng(seed)
+        flat = flat[rng.integers(0, flat.size, n_samples)]
+
+    flat = flat[np.isfinite(flat)].astype(np.float64)
+    if flat.size == 0:
+        return float("nan")
+
+    median = np.median(flat)
+    return float(MAD_TO_SIGMA * np.median(np.abs(flat - median)))
+
+
+def annulus_std(
+        annulus_sum: np.ndarray,
+        annulus_sumsq: np.ndarray,
+        annulus_area: float
+    ) -> np.ndarray:
+    """
+    Per-source sky standard deviation from annulus pixel moments.
+
+    Parameters
+    ----------
+    annulus_sum : numpy.ndarray
+        Weighted pixel sums in each background annulus.
+    annulus_sumsq : numpy.ndarray
+        Weighted sums of squared pixel values in the same annuli.
+    annulus_area : float
+        Area of the annulus in pixels.
+
+    Returns
+    -------
+    numpy.ndarray
+        Standard deviation of the pixels in each annulus.
+    """
+    mean = annulus_sum / annulus_area
+    variance = annulus_sumsq / annulus_area - mean**2
+    return np.sqrt(np.clip(variance, 0.0, None))
+
+
+# Whole-frame estimators selectable through TessPhotometry(noise_method=...).
+# "local" is computed per source from the annulus pixels instead.
+NOISE_ESTIMATORS = {
+    "sigma_clip": noise_sigma_clip,
+    "strided": noise_strided,
+    "mad": noise_mad,
+}
@@ -7,19 +7,231 @@ TESS Full Frame Images (FFIs) in parallel for a single target star.
 Each image is downloaded and analyzed independently then removed after
 photometry results are saved to disk.
 
-Parallelization is implemented using ``multiprocessing.Pool``.
+Downloads run in a thread pool and photometry in a
+``multiprocessing.Pool``, so network transfers overlap with computation.
 """
 
 import os
 import sys
 import shutil
 import tempfile
+import threading
 import multiprocessing as mp
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
+from collections import Counter
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Iterable, List, Tuple, Union
+
+import numpy as np
+
+from coltess.core import StarData, SourceCatalog, FrameCutout
+from coltess.photometry import (
+    TessPhotometry, OFF_DETECTOR, SAVED, NOT_FOUND, ERROR, cache_catalog, load_catalog_cached,
+)
+from coltess.store import ResultsWriter, open_store
+from coltess.utils import load_rejected_frames, record_rejected_frame
+from coltess.download import (
+    DownloadEngine,
+    ManifestEntry,
+    fetch_ffi_cutout,
+    filter_manifest,
+    parse_sector_script,
+    select_target_ccds,
+)
+
+# Frame outcomes reported by the workers and the download stage.
+# SAVED, NOT_FOUND, ERROR and OFF_DETECTOR come from TessPhotometry.process_frame.
+FETCHED = "fetched"
+CCD_SKIPPED = "ccd_skipped"
+
+
+class CCDFootprints:
+    """
+    Per (sector, camera, CCD) record of whether the target is on-detector.
+
+    All frames of one CCD in a sector share nearly the same pointing, so
+    once ``probe_frames`` frames of a CCD have shown the target
+    off-detector, and none has shown it on-detector, the CCD is dropped
+    and its remaining frames are skipped.
+
+    Parameters
+    ----------
+    probe_frames : int or None
+        Number of off-detector frames needed to drop a CCD. None never
+        drops a CCD.
+    """
+
+    def __init__(self, probe_frames: int | None = 1):
+        self.probe_frames = probe_frames
+        self.off_detector = Counter()
+        self.on_detector = Counter()
+        self.skipped = Counter()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(entry: ManifestEntry) -> Tuple[int, int, int]:
+        return entry.sector, entry.camera, entry.ccd
+
+    def order(self, entries: List[ManifestEntry]) -> List[ManifestEntry]:
+        """
+        Move the probe frames of every CCD to the front of the queue.
+
+        Parameters
+        ----------
+        entries : list of ManifestEntry
+            Queued entries in script order.
+
+        Returns
+        -------
+        list of ManifestEntry
+            Same entries with the first ``probe_frames`` of each CCD first.
+        """
+        if not self.probe_frames:
+            return list(entries)
+
+        seen = Counter()
+        probes, rest = [], []
+        for entry in entries:
+            key = self.key(entry)
+            if seen[key] < self.probe_frames:
+                probes.append(entry)
+            else:
+                rest.append(entry)
+            seen[key] += 1
+
+        return probes + rest
+
+    def observe(self, entry: ManifestEntry, status: str) -> None:
+        """
+        Record the outcome of a processed frame.
+
+        ``ERROR`` frames count neither way: a frame that failed to read
+        tells nothing about where the target is.
+        """
+        with self._lock:
+            if status == OFF_DETECTOR:
+                self.off_detector[self.key(entry)] += 1
+            elif status in (SAVED, NOT_FOUND):
+                self.on_detector[self.key(entry)] += 1
+
+    def is_dropped(self, entry: ManifestEntry) -> bool:
+        """Return True if the entry's CCD has been shown not to hold the target."""
+        if not self.probe_frames:
+            return False
+        key = self.key(entry)
+        with self._lock:
+            return (
+                self.off_detector[key] >= self.probe_frames
+                and self.on_detector[key] == 0
+            )
+
+    def skip(self, entry: ManifestEntry) -> None:
+        """Count a frame skipped because its CCD was dropped."""
+        with self._lock:
+            self.skipped[self.key(entry)] += 1
+
+
+@dataclass(frozen=True)
+class SharedCatalogHandle:
+    """
+    Picklable description of a catalog held in shared memory.
 
-from coltess.core import StarData
-from coltess.photometry import TessPhotometry
-from coltess.download import download_tess_images
+    Attributes
+    ----------
+    columns : tuple
+        ``(field, block name, dtype, length)`` for every catalog column.
+    """
+
+    columns: Tuple[Tuple[str, str, str, int], ...]
+
+    def attach(self) -> Tuple[SourceCatalog, list]:
+        """
+        Map the shared blocks and wrap them in a SourceCatalog.
+
+        Returns
+        -------
+        catalog : SourceCatalog
+            Catalog whose columns are views of the shared blocks.
+        blocks : list of SharedMemory
+            Attached blocks; they must stay referenced while the catalog
+            is in use.
+        """
+        arrays, blocks = {}, []
+        for name, block_name, dtype, length in self.columns:
+            block = _attach_shared_memory(block_name)
+            blocks.append(block)
+            arrays[name] = np.ndarray((length,), dtype=np.dtype(dtype), buffer=block.buf)
+            arrays[name].flags.writeable = False
+
+        return SourceCatalog(**arrays), blocks
+
+
+class SharedCatalog:
+    """
+    Shared-memory copy of a SourceCatalog owned by the parent process.
+
+    Each catalog column is copied once into its own
+    ``multiprocessing.shared_memory`` block. Workers receive the small
+    ``handle`` and map the same physical pages, so catalog memory does
+    not grow with the number of workers.
+
+    Parameters
+    ----------
+    catalog : SourceCatalog
+        Catalog to share.
+    """
+
+    def __init__(self, catalog: SourceCatalog):
+        self._blocks = []
+        columns = []
+
+        fields = ["ra", "dec", "source_id"]
+        if catalog.mag is not None:
+            fields.append("mag")
+
+        try:
+            for name in fields:
+                values = getattr(catalog, name)
+                block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+                self._blocks.append(block)
+                shared = np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)
+                shared[:] = values
+                columns.append((name, block.name, values.dtype.str, len(values)))
+        except Exception:
+            self.close()
+            raise
+
+        self.handle = SharedCatalogHandle(columns=tuple(columns))
+
+    def close(self) -> None:
+        """Release and unlink the shared blocks."""
+        for block in self._blocks:
+            block.close()
+            try:
+                block.unlink()
+            except FileNotFoundError:
+                pass
+        self._blocks = []
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing block owned by the parent process."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    # Pool workers share the parent's resource tracker, so registering
+    # the block again is a no-op; unregistering it here would make the
+    # parent's own unlink fail in the tracker.
+    return shared_memory.SharedMemory(name=name)
+
+
+# Shared blocks attached by this worker process, kept alive for its lifetime.
+_worker_blocks: list = []
+
+# Photometry processor of this worker process, created by init_worker.
+_worker_processor: TessPhotometry | None = None
 
 
 def process_images_parallel(
@@ -29,14 +241,25 @@ def process_images_parallel(
     star: StarData,
     start_idx: int = 0,
     max_workers: int | None = None,
+    ccds: Iterable[Tuple[int, int]] | None = None,
+    filter_ccds: bool = True,
+    download_workers: int | None = None,
+    max_buffered: int | None = None,
+    cutout_radius: int | None = None,
+    ccd_probe_frames: int | None = 1,
+    photometry_options: dict | None = None,
+    output_format: str = "csv",
+    flush_frames: int = 500,
 ):
     """
     Download and process TESS images in parallel for a target star.
 
     This function coordinates the parallel execution of photometry over
     a list of TESS image URLs or commands contained in a script file.
-    Each worker downloads exactly one FITS file, performs photometry,
-    writes results to disk, and deletes temporary files.
+    The script is parsed once into a manifest. A pool of download
+    threads fetches FFIs into a spool directory and hands each file to a
+    pool of worker processes, which perform photometry, write results to
+    disk, and delete the file.
 
     Parameters
     ----------
@@ -54,140 +277,485 @@ def process_images_parallel(
     max_workers : int or None, optional
         Number of parallel worker processes. Defaults to the number of
         available CPU cores.
+    ccds : iterable of tuple or None, optional
+        ``(camera, ccd)`` pairs to process. If None, they are looked up
+        with ``select_target_ccds`` from the target position.
+    filter_ccds : bool, optional
+        If False, every FFI in the script is processed regardless of
+        camera/CCD.
+    download_workers : int or None, optional
+        Number of concurrent download threads. Defaults to 4.
+    max_buffered : int or None, optional
+        Maximum number of FFIs downloading, waiting on disk or being
+        processed at once. Defaults to twice ``max_workers``.
+    cutout_radius : int or None, optional
+        If given, only the FFI header and the image rows within this many
+        pixels of the target are fetched with HTTP Range requests, and
+        photometry runs on the resulting cutout. Should exceed the
+        background annulus radius. If None, whole FFIs are downloaded.
+    ccd_probe_frames : int or None, optional
+        Number of frames of a camera/CCD that must show the target
+        off-detector (with no frame showing it on-detector) before the
+        remaining frames of that CCD are dropped. None disables this.
+    photometry_options : dict or None, optional
+        Keyword arguments for the ``TessPhotometry`` instance each worker
+        creates once and reuses for all its frames, e.g.
+        ``{"photometry_engine": "sparse"}``.
+    output_format : {"csv", "store"}, optional
+        ``"csv"`` makes every worker write one CSV per frame. ``"store"``
+        sends the rows back to the parent, where a single
+        ``ResultsWriter`` appends them to the run's ``PhotometryStore``
+        in segments of ``flush_frames`` frames, compacted into one file
+        at the end of the run. With ``photometry_options={"output_mode":
+        "all"}`` every measured source is stored, otherwise only the
+        target; ``output_mode="all"`` requires ``"store"``.
+    flush_frames : int, optional
+        Frames per store segment with ``output_format="store"``.
 
     Notes
     -----
+    - Only FFIs from the camera/CCDs covering the target are queued,
+      so frames that can never contain it are never downloaded.
+    - Frames found off-detector are recorded in ``output_dir`` and
+      skipped by later runs.
+    - The first frames of each camera/CCD are processed first as probes;
+      once they show the target off-detector, the rest of that CCD is
+      dropped from the queue.
+    - Downloads run in a thread pool and feed the photometry process
+      pool, so transfers overlap with computation. Once
+      ``max_buffered`` FFIs are in flight, new downloads wait.
+    - The catalog is loaded once by the parent into shared memory and
+      mapped read-only by every worker.
     - Each FITS file is handled independently.
-    - Temporary FITS files are stored in per-worker directories and
-      deleted after processing.
+    - Temporary FITS files are stored in a spool directory and deleted
+      after processing.
     - Pressing ``Ctrl+C`` terminates all workers immediately and exits
       with status code 130.
     """
+    if output_format not in ("csv", "store"):
+        raise ValueError(f"Unknown output format '{output_format}'")
+    if output_format == "csv" and (photometry_options or {}).get("output_mode") == "all":
+        # Workers would each write one store segment per frame.
+        raise ValueError(
+            "output_mode='all' requires output_format='store', so all sources "
+            "go through the parent's ResultsWriter"
+        )
+
     if max_workers is None:
         max_workers = mp.cpu_count()
 
-    with open(script_file) as f:
-        n_images = sum(1 for _ in f)
-
-    print(f"Processing images {start_idx} -> {n_images - 1}")
-    print(f"Using {max_workers} workers")
-
-    indices = list(range(start_idx, n_images))
-
-    worker = partial(
-        worker_process_fits,
-        script_file,
-        catalog_file=catalog_file,
-        output_dir=output_dir,
-        star=star,
+    entries = [e for e in parse_sector_script(script_file) if e.index >= start_idx]
+
+    # Frames rejected for this target by earlier runs are never fetched again.
+    rejected = load_rejected_frames(output_dir, star)
+    if rejected:
+        n_before = len(entries)
+        entries = [e for e in entries if e.filename not in rejected]
+        print(f"Skipping {n_before - len(entries)} frames rejected by previous runs")
+
+    n_total = len(entries)
+
+    if filter_ccds:
+        if ccds is None:
+            ccds = select_target_ccds(star, entries)
+        if ccds is not None:
+            entries = filter_manifest(entries, ccds)
+            if ccds:
+                print(f"Keeping camera/CCD {sorted(set(ccds))}: {len(entries)}/{n_total} images")
+            else:
+                print(f"Target is on no camera/CCD of this sector: skipping all {n_total} images")
+
+    if download_workers is None:
+        download_workers = 4
+    if max_buffered is None:
+        max_buffered = 2 * max_workers
+    max_buffered = max(max_buffered, 1)
+
+    print(f"Processing {len(entries)} images from script line {start_idx}")
+    print(
+        f"Using {max_workers} workers, {download_workers} downloads, "
+        f"up to {max_buffered} FFIs on disk"
     )
 
-    try:
-        pool = mp.get_context('fork').Pool(processes=max_workers)
-    except ValueError:
-        # Windows without WSL - needs __main__ guard
-        print("WARNING: Using 'spawn' method. Scripts should use if __name__ == '__main__' or process images sequentially")
-        pool = mp.get_context('spawn').Pool(processes=max_workers)
+    # Everything created below is released in the ``finally`` clause at
+    # the end, whether the run completes, is interrupted or fails.
+    shared = pool = spool_dir = engine = downloader = writer = None
+    write_error = None
+    completed = interrupted = False
+    footprints = CCDFootprints(ccd_probe_frames)
+
+    # One slot per FFI that is downloading, waiting on disk or being
+    # processed. Slots are released once the file has been deleted.
+    slots = threading.BoundedSemaphore(max_buffered)
+    lock = threading.Lock()
+    pending = []
+    queued = []
+    stats = {"saved": 0, "not_saved": 0, "off_detector": 0, "download_failed": 0}
+
+    def fetch(entry):
+        # (status, frame): a local FFI path or a cutout once fetched.
+        if footprints.is_dropped(entry):
+            return CCD_SKIPPED, None
+
+        if cutout_radius is None:
+            download = engine.download(entry.url, os.path.join(spool_dir, entry.filename))
+            if not download.ok:
+                raise RuntimeError(download.error)
+            return FETCHED, download.path
+
+        cutout = fetch_ffi_cutout(
+            entry.url, star.ra, star.dec, cutout_radius,
+            engine=engine, filename=entry.filename,
+        )
+        return (OFF_DETECTOR, None) if cutout is None else (FETCHED, cutout)
+
+    # Exceptions raised inside the callbacks below. Executors and pools
+    # only log (or die on) callback errors, so they are kept here and
+    # re-raised by the main loop.
+    callback_errors = []
+
+    def release(fits_path):
+        try:
+            for path in (fits_path, fits_path + ".part"):
+                if os.path.exists(path):
+                    os.remove(path)
+        finally:
+            slots.release()
+
+    def check_callbacks():
+        if callback_errors:
+            raise callback_errors[0]
+
+    def on_processed(entry, fits_path, result):
+        try:
+            _, status, rows = result
+            if rows is not None:
+                writer.write(entry.filename, rows)
+            footprints.observe(entry, status)
+            with lock:
+                if status == SAVED and rows is not None:
+                    # Counted as saved once the writer has stored the frame.
+                    queued.append(entry.filename)
+                elif status == SAVED:
+                    stats["saved"] += 1
+                elif status == OFF_DETECTOR:
+                    stats["off_detector"] += 1
+                else:
+                    stats["not_saved"] += 1
+        except Exception as e:
+            callback_errors.append(e)
+        finally:
+            release(fits_path)
+
+    def on_failed(entry, fits_path, error):
+        try:
+            print(f"Error processing {entry.filename}: {error}")
+            with lock:
+                stats["not_saved"] += 1
+        except Exception as e:
+            callback_errors.append(e)
+        finally:
+            release(fits_path)
+
+    def on_downloaded(entry, future):
+        fits_path = os.path.join(spool_dir, entry.filename)
+        # The slot passes to the pool callbacks once the frame is submitted.
+        submitted = False
+        try:
+            try:
+                status, frame = future.result()
+            except Exception as e:
+                print(f"Download failed for {entry.filename}: {e}")
+                with lock:
+                    stats["download_failed"] += 1
+                return
+
+            if status == CCD_SKIPPED:
+                footprints.skip(entry)
+            if status != FETCHED:
+                if status == OFF_DETECTOR:
+                    record_rejected_frame(output_dir, entry.filename, OFF_DETECTOR, star)
+                    footprints.observe(entry, status)
+                    with lock:
+                        stats["off_detector"] += 1
+                return
+
+            async_result = pool.apply_async(
+                worker_process_fits,
+                (entry, frame),
+                dict(
+                    catalog_file=catalog_file, output_dir=output_dir, star=star,
+                    collect=writer is not None,
+                ),
+                callback=partial(on_processed, entry, fits_path),
+                error_callback=partial(on_failed, entry, fits_path),
+            )
+            submitted = True
+            with lock:
+                pending.append(async_result)
+        except Exception as e:
+            callback_errors.append(e)
+        finally:
+            if not submitted:
+                release(fits_path)
 
     try:
-        for _ in pool.imap_unordered(worker, indices):
-            pass
+        # Parse the catalog once here and publish it in shared memory; every
+        # worker maps the same pages instead of holding its own copy.
+        shared = SharedCatalog(load_catalog_cached(catalog_file))
+        initargs = (catalog_file, shared.handle, photometry_options)
+
+        # The pool is created before any download thread starts so that
+        # forking never happens while threads hold locks.
+        try:
+            pool = mp.get_context('fork').Pool(
+                processes=max_workers,
+                initializer=init_worker,
+                initargs=initargs,
+            )
+        except ValueError:
+            # Windows without WSL - needs __main__ guard
+            print("WARNING: Using 'spawn' method. Scripts should use if __name__ == '__main__' or process images sequentially")
+            pool = mp.get_context('spawn').Pool(
+                processes=max_workers,
+                initializer=init_worker,
+                initargs=initargs,
+            )
+
+        spool_dir = tempfile.mkdtemp(prefix="tess_spool_")
+        engine = DownloadEngine(max_workers=download_workers)
+        downloader = ThreadPoolExecutor(max_workers=download_workers)
+        if output_format == "store":
+            writer = ResultsWriter(open_store(output_dir), flush_frames=flush_frames)
+
+        for entry in footprints.order(entries):
+            if footprints.is_dropped(entry):
+                footprints.skip(entry)
+                continue
+            slots.acquire()
+            check_callbacks()
+            future = downloader.submit(fetch, entry)
+            future.add_done_callback(partial(on_downloaded, entry))
+
+        downloader.shutdown(wait=True)
+        for async_result in list(pending):
+            async_result.wait()
+        check_callbacks()
+        completed = True
 
     except KeyboardInterrupt:
         print("\nCtrl+C detected — terminating workers immediately...")
-        pool.terminate()
-        pool.join()
+        interrupted = True
+
+    finally:
+        if downloader is not None and not completed:
+            downloader.shutdown(wait=False, cancel_futures=True)
+        if pool is not None:
+            if completed:
+                pool.close()
+            else:
+                pool.terminate()
+            pool.join()
+        if engine is not None:
+            engine.close()
+        if shared is not None:
+            shared.close()
+        if spool_dir is not None:
+            shutil.rmtree(spool_dir, ignore_errors=True)
+        if writer is not None:
+            try:
+                segment = writer.close()
+            except RuntimeError as e:
+                write_error = e
+                segment = writer.segments[-1] if writer.segments else None
+                if not completed:
+                    print(e)
+
+    if interrupted:
         sys.exit(130)
 
-    else:
-        pool.close()
-        pool.join()
+    if writer is not None:
+        failed = set(writer.failed_frames)
+        lost = sum(name in failed for name in queued)
+        stats["saved"] += len(queued) - lost
+        stats["not_saved"] += lost
+        if segment is not None:
+            print(f"Wrote {writer.frames_written} frames to {segment}")
+
+    print(
+        f"Done: {stats['saved']} saved, {stats['not_saved']} without target, "
+        f"{stats['off_detector']} off-detector, "
+        f"{stats['download_failed']} failed downloads"
+    )
+    for (sector, camera, ccd), n_skipped in sorted(footprints.skipped.items()):
+        print(
+            f"Skipped {n_skipped} frames of sector {sector} camera {camera} "
+            f"CCD {ccd}: target off-detector in probe frames"
+        )
+    if write_error is not None:
+        raise write_error
+
+
+def init_worker(
+    catalog_file: str,
+    shared_catalog: SharedCatalogHandle | None = None,
+    photometry_options: dict | None = None,
+):
+    """
+    Pool initializer that preloads the catalog and sets up photometry.
+
+    Parameters
+    ----------
+    catalog_file : str
+        Path to a Gaia catalog CSV.
+    shared_catalog : SharedCatalogHandle or None, optional
+        Handle of the parent's shared-memory catalog. If given, the
+        worker maps it instead of parsing ``catalog_file``.
+    photometry_options : dict or None, optional
+        Keyword arguments for the worker's ``TessPhotometry`` instance.
+    """
+    global _worker_processor
+
+    # One processor per worker, so cached aperture weights survive
+    # from frame to frame.
+    _worker_processor = TessPhotometry(**(photometry_options or {}))
+
+    if shared_catalog is None:
+        load_catalog_cached(catalog_file)
+        return
+
+    catalog, blocks = shared_catalog.attach()
+    _worker_blocks.extend(blocks)
+    cache_catalog(catalog_file, catalog)
+
+
+def collect_rows(
+    processor: TessPhotometry,
+    entry: ManifestEntry,
+    fits_path: Union[str, FrameCutout],
+    catalog_file: str,
+    output_dir: str,
+    star: StarData,
+):
+    """
+    Measure a frame and return the rows to store instead of writing them.
+
+    Like ``TessPhotometry.process_frame``, local FFIs whose header puts
+    the target off the detector are rejected before reading pixels and
+    recorded in ``output_dir``, and the file is opened only once.
+
+    Returns
+    -------
+    tuple
+        (status, rows), with ``rows`` None when nothing is stored.
+    """
+    try:
+        with processor.open_frame(fits_path) as hdu:
+            if (
+                hdu is not None
+                and not processor.check_footprint(hdu.header, star.ra, star.dec)
+            ):
+                record_rejected_frame(output_dir, entry.filename, OFF_DETECTOR, star)
+                return OFF_DETECTOR, None
+
+            result, idx = processor.measure_frame(
+                fits_path, processor.load_catalog(catalog_file), star, hdu=hdu
+            )
+    except Exception as e:
+        print(f"[PID {os.getpid()}] Error processing {entry.filename}: {e}")
+        return ERROR, None
+
+    if result is None:
+        return NOT_FOUND, None
+
+    status = NOT_FOUND if idx is None else SAVED
+    if processor.output_mode == "all":
+        return status, result
+    if idx is None:
+        return status, None
+    return status, result[idx:idx+1]
 
 
 def worker_process_fits(
-    script_file: str,
-    index: int,
+    entry: ManifestEntry,
+    fits_path: Union[str, FrameCutout],
     catalog_file: str,
     output_dir: str,
     star: StarData,
+    collect: bool = False,
 ):
     """
-    Process a single TESS FITS image.
+    Process a single downloaded TESS FITS image.
 
     This worker function performs the following steps:
-    1. Downloads exactly one FITS file specified by ``index`` in the
-       download script.
-    2. Runs aperture photometry for the target star.
-    3. Writes photometry results to a CSV file.
-    4. Deletes all temporary files and directories.
+    1. Runs aperture photometry for the target star.
+    2. Writes photometry results to a CSV file.
+    3. Deletes the local FITS file, if any.
 
     Parameters
     ----------
-    script_file : str
-        Path to the TESS download script.
-    index : int
-        Line index in the script file corresponding to the image to process.
+    entry : ManifestEntry
+        Parsed script entry of the image to process.
+    fits_path : str or FrameCutout
+        Path of the FFI downloaded by the parent process, or a cutout
+        fetched with Range requests.
     catalog_file : str
-        Path to a Gaia catalog CSV.
+        Path to a Gaia catalog CSV, preloaded by ``init_worker``.
     output_dir : str
         Directory where the resulting photometry CSV will be saved.
     star : StarData
         Target star information.
+    collect : bool, optional
+        Return the photometry rows to the caller instead of writing a
+        CSV file, for the parent's ``ResultsWriter``.
 
     Returns
     -------
     tuple
-        (index, success) where ``success`` is True if photometry was
-        successfully performed and saved, False otherwise.
+        (index, status, rows) where ``status`` is ``SAVED`` if photometry
+        was successfully performed and saved, ``OFF_DETECTOR`` if the
+        header WCS puts the target off the image, ``ERROR`` if the frame
+        could not be read or measured, and ``NOT_FOUND`` otherwise. ``rows`` is the table to store when ``collect`` is
+        set (every measured source with ``output_mode="all"``, else the
+        target row) and None otherwise.
 
     Notes
     -----
-    - Each worker runs in its own process and uses a unique temporary
-      directory.
-    - All temporary files are deleted even if an exception occurs.
+    - Each worker runs in its own process.
+    - The FITS file is deleted even if an exception occurs.
     """
 
-    success = False
+    index = entry.index
 
     print(
         f"[PID {os.getpid()}] "
         f"Processing script line {index + 1}"
     )
 
-    tmp_dir = tempfile.mkdtemp(prefix="tess_")
-
     try:
-        download_tess_images(
-            script_file,
-            start_idx=index,
-            num_images=1,
-            output_dir=tmp_dir,
-        )
+        processor = _worker_processor or TessPhotometry()
 
-        fits_files = [
-            os.path.join(tmp_dir, f)
-            for f in os.listdir(tmp_dir)
-            if f.endswith(".fits")
-        ]
-
-        if fits_files:
-            processor = TessPhotometry()
-            success = processor.process_image(
-                fits_files[0],
-                catalog_file=catalog_file,
-                target_star = star,
-                output_dir=output_dir,
-            )
+        if collect:
+            return (index, *collect_rows(processor, entry, fits_path, catalog_file, output_dir, star))
+
+        # process_frame rejects off-detector frames from the header itself.
+        status = processor.process_frame(
+            fits_path,
+            catalog_file=catalog_file,
+            target_star = star,
+            output_dir=output_dir,
+        )
 
-        if success:
-            filename = os.path.basename(fits_files[0]).replace(".fits", ".csv")
+        if status == SAVED:
+            filename = entry.filename.replace(".fits", ".csv")
             output_path = os.path.join(output_dir, filename)
             print(
                 f"[PID {os.getpid()}] "
                 f"Star detected at line {index + 1} saved at {output_path}"
             )
 
-        return index, success
+        return index, status, None
 
     finally:
-        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if isinstance(fits_path, str) and os.path.exists(fits_path):
+            os.remove(fits_path)
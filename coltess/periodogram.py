@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+"""
+Batched Lomb-Scargle periodograms for many light curves.
+
+Field stars are screened for variability by spreading the periodograms
+of a light-curve matrix over a process pool in chunks of stars. Workers
+keep each full power spectrum only while it is being evaluated and send
+back a compact summary per star (top periods, their powers and the
+false-alarm probability of the best one), so memory stays bounded by
+the number of stars times ``n_peaks`` whatever the grid size.
+
+The significance of a single light curve can also be estimated by
+resampling (``bootstrap_significance``): batches of resampled
+periodograms are evaluated on one precomputed grid across the pool,
+each batch seeded from its own child of a ``SeedSequence`` so the
+result does not depend on the number of workers.
+"""
+
+import multiprocessing as mp
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+from astropy.timeseries import LombScargle
+
+from coltess.analysis import FAST_METHOD_MIN_POINTS, frequency_grid, refine_peaks, top_peaks
+
+
+@dataclass(eq=False)
+class PeriodogramSummary:
+    """
+    Compact periodogram results of many stars, one row per star.
+
+    Attributes
+    ----------
+    periods : numpy.ndarray
+        Periods of the highest peaks in days, shape (n_stars, n_peaks),
+        highest peak first, located with ``refine_peaks``. NaN-padded
+        when a star has fewer peaks.
+    powers : numpy.ndarray
+        Lomb-Scargle power of those peaks, same shape as ``periods``.
+    fap : numpy.ndarray
+        False-alarm probability of each star's highest peak.
+    n_points : numpy.ndarray
+        Number of finite points used for each star.
+    """
+
+    periods: np.ndarray
+    powers: np.ndarray
+    fap: np.ndarray
+    n_points: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.fap)
+
+    @property
+    def best_period(self) -> np.ndarray:
+        """Period of the highest peak of every star."""
+        return self.periods[:, 0]
+
+
+# Light curves shared with the workers by _init_batch_worker.
+_batch_times: Optional[np.ndarray] = None
+_batch_fluxes: Optional[np.ndarray] = None
+_batch_options: dict = {}
+
+
+def _pool_context():
+    """Fork where available so the workers inherit the light curves."""
+    try:
+        return mp.get_context("fork")
+    except ValueError:
+        return mp.get_context("spawn")
+
+
+def _init_batch_worker(times: np.ndarray, fluxes: np.ndarray, options: dict) -> None:
+    global _batch_times, _batch_fluxes, _batch_options
+    _batch_times = times
+    _batch_fluxes = fluxes
+    _batch_options = options
+
+
+def _summarize_star(
+        times: np.ndarray,
+        fluxes: np.ndarray,
+        min_period: float,
+        max_period: float,
+        grid: str,
+        samples_per_peak: float,
+        method: str,
+        n_peaks: int,
+        fap_method: str,
+        min_points: int
+    ) -> tuple:
+    """Periodogram summary (periods, powers, fap, n) of one light curve."""
+    periods = np.full(n_peaks, np.nan)
+    powers = np.full(n_peaks, np.nan)
+
+    valid = np.isfinite(times) & np.isfinite(fluxes)
+    n = int(valid.sum())
+    if n < min_points:
+        return periods, powers, np.nan, n
+
+    t, y = times[valid], fluxes[valid]
+    frequency = frequency_grid(t, min_period, max_period, grid=grid,
+                               samples_per_peak=samples_per_peak)
+    if method == "auto":
+        method = "fast" if n >= FAST_METHOD_MIN_POINTS else "cython"
+
+    ls = LombScargle(t, y)
+    power = ls.power(frequency, method=method, assume_regular_frequency=True)
+
+    peaks = top_peaks(power, n_peaks)
+    periods[:len(peaks)], powers[:len(peaks)] = refine_peaks(ls, frequency, peaks)
+
+    fap = np.nan
+    if len(peaks):
+        fap = float(ls.false_alarm_probability(
+            powers[0],
+            method=fap_method,
+            minimum_frequency=frequency[0],
+            maximum_frequency=frequency[-1],
+        ))
+
+    return periods, powers, fap, n
+
+
+def _summarize_chunk(indices: np.ndarray) -> List[tuple]:
+    """Summaries of the worker's shared light curves at ``indices``."""
+    out = []
+    for i in indices:
+        times = _batch_times if _batch_times.ndim == 1 else _batch_times[i]
+        out.append((i, *_summarize_star(times, _batch_fluxes[i], **_batch_options)))
+    return out
+
+
+def batch_periodogram(
+        times: np.ndarray,
+        fluxes: np.ndarray,
+        min_period: float = 0.1,
+        max_period: float = 10.0,
+        grid: str = "adaptive",
+        samples_per_peak: float = 5.0,
+        method: str = "auto",
+        n_peaks: int = 3,
+        fap_method: str = "baluev",
+        min_points: int = 10,
+        max_workers: Optional[int] = None,
+        chunk_size: int = 32
+    ) -> PeriodogramSummary:
+    """
+    Compute compact Lomb-Scargle summaries for many light curves.
+
+    Parameters
+    ----------
+    times : numpy.ndarray
+        Observation times in days, either shared by every star (shape
+        ``(n_times,)``) or per star (shape ``(n_stars, n_times)``).
+    fluxes : numpy.ndarray
+        Light-curve matrix, shape ``(n_stars, n_times)``. NaN marks
+        missing points.
+    min_period, max_period : float, optional
+        Period range in days.
+    grid : {"fixed", "adaptive"}, optional
+        Frequency grid of each star, see ``frequency_grid``.
+    samples_per_peak : float, optional
+        Oversampling factor of the adaptive grid.
+    method : str, optional
+        ``LombScargle.power`` method; ``"auto"`` as in
+        ``compute_periodogram``.
+    n_peaks : int, optional
+        Number of peaks kept per star.
+    fap_method : str, optional
+        ``LombScargle.false_alarm_probability`` method for the highest
+        peak; the default analytic ``"baluev"`` bound costs nothing.
+    min_points : int, optional
+        Stars with fewer finite points get NaN summaries.
+    max_workers : int or None, optional
+        Number of worker processes. Defaults to the number of CPU cores;
+        1 runs in the calling process.
+    chunk_size : int, optional
+        Number of stars per task sent to a worker.
+
+    Returns
+    -------
+    PeriodogramSummary
+        One row per input star, in input order.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    fluxes = np.atleast_2d(np.asarray(fluxes, dtype=np.float64))
+    n_stars = len(fluxes)
+
+    if times.ndim == 1 and times.shape[0] != fluxes.shape[1]:
+        raise ValueError("Shared times must have one entry per flux column")
+    if times.ndim == 2 and times.shape != fluxes.shape:
+        raise ValueError("Per-star times must have the shape of fluxes")
+
+    options = dict(
+        min_period=min_period, max_period=max_period, grid=grid,
+        samples_per_peak=samples_per_peak, method=method, n_peaks=n_peaks,
+        fap_method=fap_method, min_points=min_points,
+    )
+
+    summary = PeriodogramSummary(
+        periods=np.full((n_stars, n_peaks), np.nan),
+        powers=np.full((n_stars, n_peaks), np.nan),
+        fap=np.full(n_stars, np.nan),
+        n_points=np.zeros(n_stars, dtype=np.int64),
+    )
+
+    if max_workers is None:
+        max_workers = mp.cpu_count()
+    chunks = [
+        np.arange(start, min(start + chunk_size, n_stars))
+        for start in range(0, n_stars, max(chunk_size, 1))
+    ]
+
+    if max_workers <= 1 or len(chunks) <= 1:
+        _init_batch_worker(times, fluxes, options)
+        results = map(_summarize_chunk, chunks)
+        _collect(summary, results)
+        _init_batch_worker(None, None, {})
+        return summary
+
+    initargs = (times, fluxes, options)
+    with _pool_context().Pool(processes=max_workers, initializer=_init_batch_worker,
+                      initargs=initargs) as pool:
+        _collect(summary, pool.imap_unordered(_summarize_chunk, chunks))
+
+    return summary
+
+
+def _collect(summary: PeriodogramSummary, results) -> None:
+    for chunk in results:
+        for i, periods, powers, fap, n in chunk:
+            summary.periods[i] = periods
+            summary.powers[i] = powers
+            summary.fap[i] = fap
+            summary.n_points[i] = n
+
+
+@dataclass(eq=False)
+class BootstrapSignificance:
+    """
+    Resampling significance of the highest periodogram peak.
+
+    Attributes
+    ----------
+    period : float
+        Period of the highest peak of the observed light curve in days,
+        located with ``refine_peaks``.
+    power : float
+        Lomb-Scargle power of that peak on the search grid, the value
+        compared with the highest power of each null resample.
+    fap : float
+        False-alarm probability: fraction of resampled (null) light curves
+        whose highest peak is at least as strong, ``(k + 1) / (n + 1)``.
+    fap_error : float
+        Binomial standard error of ``fap``.
+    period_uncertainty : float
+        Standard deviation of the peak period over bootstrap resamples of
+        the observations, NaN if not computed.
+    n_resamples : int
+        Number of resamples actually evaluated.
+    converged : bool
+        True if sampling stopped early because ``fap_error`` reached the
+        tolerance.
+    null_powers : numpy.ndarray
+        Highest power of each null resample.
+    resampled_periods : numpy.ndarray
+        Peak period of each bootstrap resample (empty without
+        ``period_uncertainty``).
+    """
+
+    period: float
+    power: float
+    fap: float
+    fap_error: float
+    period_uncertainty: float
+    n_resamples: int
+    converged: bool
+    null_powers: np.ndarray
+    resampled_periods: np.ndarray
+
+
+# Frequencies sampled across the observed peak for the period bootstrap.
+WINDOW_SAMPLES = 101
+
+# Light curve and grid shared with the workers by _init_resample_worker.
+_resample_state: dict = {}
+
+
+def _init_resample_worker(state: dict) -> None:
+    global _resample_state
+    _resample_state = state
+
+
+def _resample_batch(task: Tuple[int, np.random.SeedSequence, int]) -> Tuple[int, np.ndarray, np.ndarray]:
+    """Null peak powers and bootstrap peak periods of one seeded batch."""
+    index, seed, n = task
+    state = _resample_state
+    t, y = state["times"], state["fluxes"]
+    frequency, method = state["frequency"], state["method"]
+    rng = np.random.default_rng(seed)
+
+    null_powers = np.empty(n)
+    periods = np.full(n if state["period_uncertainty"] else 0, np.nan)
+    window = state["window"]
+
+    for j in range(n):
+        if state["mode"] == "permutation":
+            null = rng.permutation(y)
+        else:
+            null = rng.choice(y, size=len(y), replace=True)
+        power = LombScargle(t, null).power(frequency, method=method,
+                                           assume_regular_frequency=True)
+        null_powers[j] = power.max()
+
+        if len(periods):
+            pick = rng.integers(0, len(t), len(t))
+            power = LombScargle(t[pick], y[pick]).power(window, method="cython")
+            periods[j] = 1 / window[np.argmax(power)]
+
+    return index, null_powers, periods
+
+
+def bootstrap_significance(
+        times: np.ndarray,
+        fluxes: np.ndarray,
+        min_period: float = 0.1,
+        max_period: float = 10.0,
+        frequency: Optional[np.ndarray] = None,
+        grid: str = "adaptive",
+        samples_per_peak: float = 5.0,
+        method: str = "auto",
+        mode: str = "bootstrap",
+        n_resamples: int = 1000,
+        batch_size: int = 50,
+        tol: float = 0.005,
+        min_resamples: int = 100,
+        period_uncertainty: bool = True,
+        seed: Optional[int] = 0,
+        max_workers: Optional[int] = None
+    ) -> BootstrapSignificance:
+    """
+    Estimate the significance and period uncertainty of the highest peak
+    by resampling the light curve.
+
+    The false-alarm probability is the fraction of null light curves,
+    built by resampling the fluxes over the observed times, whose highest
+    peak reaches the observed power. The period uncertainty is the spread
+    of the peak period over bootstrap resamples of the (time, flux)
+    pairs, searched on ``WINDOW_SAMPLES`` frequencies within one
+    resolution element ``1 / baseline`` of the observed peak.
+
+    Resamples are evaluated in batches of ``batch_size`` across a process
+    pool. Batch ``i`` always uses child ``i`` of ``SeedSequence(seed)``
+    and batches are accumulated in order, so the result is reproducible
+    and independent of ``max_workers``. Sampling stops after a batch once
+    at least ``min_resamples`` resamples are in and the standard error of
+    the FAP is at most ``tol``: a clearly significant peak (no null
+    exceedances) converges after about ``1 / tol`` resamples.
+
+    Parameters
+    ----------
+    times, fluxes : array_like
+        Light curve; non-finite points are ignored.
+    min_period, max_period : float, optional
+        Period range in days, used when ``frequency`` is not given.
+    frequency : numpy.ndarray, optional
+        Precomputed regular frequency grid (e.g. the ``'frequency'`` of
+        ``compute_periodogram``), shared by all resamples.
+    grid : {"fixed", "adaptive"}, optional
+        Grid built when ``frequency`` is not given, see ``frequency_grid``.
+    samples_per_peak : float, optional
+        Oversampling factor of the adaptive grid.
+    method : str, optional
+        ``LombScargle.power`` method; ``"auto"`` as in
+        ``compute_periodogram``.
+    mode : {"bootstrap", "permutation"}, optional
+        Null resampling: fluxes drawn with replacement, or shuffled.
+    n_resamples : int, optional
+        Maximum number of resamples.
+    batch_size : int, optional
+        Resamples per task sent to a worker, and the granularity of the
+        convergence check.
+    tol : float, optional
+        Standard error of the FAP at which sampling stops early. Use 0 to
+        always draw ``n_resamples``.
+    min_resamples : int, optional
+        Resamples drawn before early stopping is considered.
+    period_uncertainty : bool, optional
+        Also bootstrap the period uncertainty (one extra periodogram over
+        the peak window per resample).
+    seed : int or None, optional
+        Root seed of the resampling.
+    max_workers : int or None, optional
+        Number of worker processes. Defaults to the number of CPU cores;
+        1 runs in the calling process.
+
+    Returns
+    -------
+    BootstrapSignificance
+        Observed peak, FAP with its standard error and the bootstrap
+        period uncertainty.
+
+    Raises
+    ------
+    ValueError
+        If ``mode`` is unknown or the light curve has fewer than two
+        distinct finite times.
+    """
+    if mode not in ("bootstrap", "permutation"):
+        raise ValueError(f"Unknown resampling mode '{mode}', "
+                         "expected 'bootstrap' or 'permutation'")
+
+    t = np.asarray(times, dtype=np.float64)
+    y = np.asarray(fluxes, dtype=np.float64)
+    valid = np.isfinite(t) & np.isfinite(y)
+    t, y = t[valid], y[valid]
+    if len(t) < 2 or np.ptp(t) <= 0:
+        raise ValueError("At least two distinct observation times are required")
+
+    if frequency is None:
+        frequency = frequency_grid(t, min_period, max_period, grid=grid,
+                                   samples_per_peak=samples_per_peak)
+    frequency = np.asarray(frequency, dtype=np.float64)
+    if method == "auto":
+        method = "fast" if len(t) >= FAST_METHOD_MIN_POINTS else "cython"
+
+    ls = LombScargle(t, y)
+    power = ls.power(frequency, method=method, assume_regular_frequency=True)
+    best = int(np.argmax(power))
+    observed = float(power[best])
+    period = float(refine_peaks(ls, frequency, np.array([best]))[0][0])
+
+    # Finely sampled window so the resampled periods are not quantized
+    # to the (coarser) search grid.
+    width = 1 / np.ptp(t)
+    window = np.linspace(max(1 / period - width, frequency[0]),
+                         min(1 / period + width, frequency[-1]),
+                         WINDOW_SAMPLES)
+    state = dict(times=t, fluxes=y, frequency=frequency, method=method,
+                 mode=mode, window=window, period_uncertainty=period_uncertainty)
+
+    sizes = [min(batch_size, n_resamples - start)
+             for start in range(0, n_resamples, max(batch_size, 1))]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = list(zip(range(len(sizes)), seeds, sizes))
+
+    if max_workers is None:
+        max_workers = mp.cpu_count()
+
+    null_powers: List[np.ndarray] = []
+    periods: List[np.ndarray] = []
+
+    def accumulate(results) -> bool:
+        # Batches arrive in order; returns True once the FAP has converged.
+        for _, batch_powers, batch_periods in results:
+            null_powers.append(batch_powers)
+            periods.append(batch_periods)
+            n = sum(len(p) for p in null_powers)
+            if n >= min_resamples and _fap(null_powers, observed)[1] <= tol:
+                return True
+        return False
+
+    if max_workers <= 1 or len(tasks) <= 1:
+        _init_resample_worker(state)
+        converged = accumulate(map(_resample_batch, tasks))
+        _init_resample_worker({})
+    else:
+        with _pool_context().Pool(processes=max_workers, initializer=_init_resample_worker,
+                                  initargs=(state,)) as pool:
+            # Leaving the block terminates batches still running after convergence.
+            converged = accumulate(pool.imap(_resample_batch, tasks))
+
+    fap, fap_error = _fap(null_powers, observed)
+    null = np.concatenate(null_powers) if null_powers else np.empty(0)
+    resampled = np.concatenate(periods) if periods else np.empty(0)
+
+    return BootstrapSignificance(
+        period=period,
+        power=observed,
+        fap=fap,
+        fap_error=fap_error,
+        period_uncertainty=float(np.std(resampled, ddof=1)) if len(resampled) > 1 else np.nan,
+        n_resamples=len(null),
+        converged=converged,
+        null_powers=null,
+        resampled_periods=resampled,
+    )
+
+
+def _fap(null_powers: List[np.ndarray], observed: float) -> Tuple[float, float]:
+    """Resampling FAP ``(k + 1) / (n + 1)`` and its binomial standard error."""
+    n = sum(len(p) for p in null_powers)
+    k = sum(int(np.count_nonzero(p >= observed)) for p in null_powers)
+    fap = (k + 1) / (n + 1)
+    return fap, float(np.sqrt(fap * (1 - fap) / max(n, 1)))
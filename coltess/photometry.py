@@ -4,22 +4,27 @@ Photometry analysis for TESS data
 """
 
 import os
+import threading
 import numpy as np
-from typing import List, Optional
-import pandas as pd
-import functools
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional, Tuple, Union
 
-from coltess.core import StarData
+from coltess.core import StarData, SourceCatalog, FrameCutout
+from coltess.apertures import SparseApertureEngine
+from coltess.centroids import centroid_com_batch, centroid_quadratic_batch
+from coltess.astrometry import PointingOffset, fit_pointing_offset, select_reference_stars
+from coltess.noise import NOISE_ESTIMATORS, annulus_std
+from coltess.store import open_store
+from coltess.utils import record_rejected_frame
 
 from astropy.io import fits
 from astropy.wcs import WCS, FITSFixedWarning
 from astropy.table import Table
 from astropy.coordinates import SkyCoord
 from astropy import units as u
-from astropy.stats import sigma_clipped_stats
 
 from photutils.aperture import CircularAperture, CircularAnnulus, aperture_photometry
-from photutils.centroids import centroid_sources, centroid_com
 
 import warnings
 warnings.filterwarnings(
@@ -27,6 +32,125 @@ warnings.filterwarnings(
     category=FITSFixedWarning
 )
 
+# Batched centroid functions selectable through TessPhotometry(centroid_method=...).
+CENTROID_METHODS = {
+    "com": centroid_com_batch,
+    "quadratic": centroid_quadratic_batch,
+}
+
+# Rejection reason for frames whose WCS puts the target off the detector.
+OFF_DETECTOR = "off_detector"
+
+# Outcomes of process_frame besides OFF_DETECTOR. ERROR marks a frame that
+# raised while being read or measured, so it says nothing about the footprint.
+SAVED = "saved"
+NOT_FOUND = "not_found"
+ERROR = "error"
+
+# Nominal TESS plate scale in arcsec per pixel.
+TESS_PIXEL_SCALE = 21.0
+
+# Process-wide catalog cache. Keys are (absolute path, mtime_ns, size) so an
+# edited catalog is re-read, and the least recently used entry is evicted
+# once the cache is full.
+CATALOG_CACHE_MAXSIZE = 8
+_catalog_cache: "OrderedDict[tuple, SourceCatalog]" = OrderedDict()
+_catalog_cache_lock = threading.Lock()
+
+
+def _catalog_cache_key(catalog_file: str) -> tuple:
+    """Return the (absolute path, mtime_ns, size) cache key of a catalog file."""
+    path = os.path.abspath(catalog_file)
+    stat = os.stat(path)
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+
+def cache_catalog(catalog_file: str, catalog: SourceCatalog) -> None:
+    """
+    Store an already loaded catalog in the process-wide catalog cache.
+
+    Parameters
+    ----------
+    catalog_file : str
+        Path of the CSV file the catalog was loaded from.
+    catalog : SourceCatalog
+        Catalog returned by later ``load_catalog_cached`` calls for
+        ``catalog_file``, e.g. one backed by shared memory.
+    """
+    key = _catalog_cache_key(catalog_file)
+
+    with _catalog_cache_lock:
+        # Drop stale versions of the same file before inserting.
+        for stale in [k for k in _catalog_cache if k[0] == key[0]]:
+            del _catalog_cache[stale]
+        _catalog_cache[key] = catalog
+        while len(_catalog_cache) > CATALOG_CACHE_MAXSIZE:
+            _catalog_cache.popitem(last=False)
+
+
+def load_catalog_cached(catalog_file: str) -> SourceCatalog:
+    """
+    Load a catalog CSV through the process-wide catalog cache.
+
+    Parameters
+    ----------
+    catalog_file : str
+        Path to the Gaia catalog CSV file.
+
+    Returns
+    -------
+    SourceCatalog
+        Cached catalog. Callers must treat it as read-only since the same
+        object is shared by every caller in the process.
+    """
+    key = _catalog_cache_key(catalog_file)
+
+    with _catalog_cache_lock:
+        catalog = _catalog_cache.get(key)
+        if catalog is not None:
+            _catalog_cache.move_to_end(key)
+            return catalog
+
+    catalog = SourceCatalog.from_csv(key[0])
+    cache_catalog(catalog_file, catalog)
+
+    return catalog
+
+
+def clear_catalog_cache() -> None:
+    """Remove every catalog from the process-wide catalog cache."""
+    with _catalog_cache_lock:
+        _catalog_cache.clear()
+
+
+def footprint_contains(header: fits.Header, ra, dec) -> np.ndarray:
+    """
+    Test which sky positions fall on the image described by a FITS header.
+
+    Only the header is needed: the WCS is built from it and the image
+    size is taken from ``NAXIS1``/``NAXIS2``, so no pixel data is read.
+
+    Parameters
+    ----------
+    header : astropy.io.fits.Header
+        Header of the image extension.
+    ra, dec : float or array_like
+        Sky positions in degrees (ICRS).
+
+    Returns
+    -------
+    numpy.ndarray
+        Boolean mask, True where the position lands on the image.
+    """
+    ra = np.atleast_1d(np.asarray(ra, dtype=np.float64))
+    dec = np.atleast_1d(np.asarray(dec, dtype=np.float64))
+    shape = (header.get("NAXIS2", 0), header.get("NAXIS1", 0))
+
+    _, _, in_frame = TessPhotometry._project_catalog(WCS(header), ra, dec, shape)
+
+    return in_frame
+
+
 class TessPhotometry:
     """
     Aperture photometry pipeline for TESS Full Frame Images (FFIs).
@@ -45,6 +169,17 @@ class TessPhotometry:
             annulus_inner: int = 12,
             annulus_outer: int = 14,
             zeropoint: float = 20.4402281476,
+            cutout_margin: Optional[int] = None,
+            photometry_engine: str = "photutils",
+            centroid_method: str = "com",
+            astrometry: str = "per_source",
+            n_reference: int = 20,
+            fit_rotation: bool = False,
+            isolation_radius: float = 3.0,
+            noise_method: str = "sigma_clip",
+            sources: str = "all",
+            neighbor_radius: Optional[float] = None,
+            output_mode: str = "target",
         ):
         """
         Initialize the photometry configuration.
@@ -60,6 +195,56 @@ class TessPhotometry:
         zeropoint : float, optional
             Photometric zeropoint used to convert fluxes to instrumental
             magnitudes.
+        cutout_margin : int or None, optional
+            If given, local FITS files are memory-mapped and only the
+            region covering the in-frame sources, their annuli and this
+            many extra pixels (used for the noise estimate) is read.
+            If None, the full image is loaded.
+        photometry_engine : {"photutils", "sparse"}, optional
+            ``"photutils"`` builds apertures and calls
+            ``aperture_photometry`` on every frame. ``"sparse"`` caches the
+            exact-overlap pixel weights of all apertures per camera/CCD in
+            a ``SparseApertureEngine`` and reuses them, recomputing only
+            the sources that drift beyond its tolerance.
+        centroid_method : {"com", "quadratic"}, optional
+            Centroid refinement applied to all sources at once:
+            center of mass (``centroid_com_batch``) or quadratic peak
+            fit (``centroid_quadratic_batch``) in a 3x3 box.
+        astrometry : {"per_source", "global"}, optional
+            ``"per_source"`` centroids every source. ``"global"`` centroids
+            only ``n_reference`` bright isolated stars, fits one pointing
+            offset for the frame and applies it to all sources; the offset
+            is written to the ``PTG_*`` output columns.
+        n_reference : int, optional
+            Number of reference stars in global astrometry mode.
+        fit_rotation : bool, optional
+            Fit a small rotation in addition to the shift in global
+            astrometry mode.
+        isolation_radius : float, optional
+            Reference stars in global astrometry mode must have no other
+            catalog source within this many pixels, so no neighbor falls
+            in their 3x3 centroid box. It is kept well below
+            ``aperture_radius``, which would leave almost no references
+            in crowded fields.
+        noise_method : {"sigma_clip", "strided", "mad", "local"}, optional
+            Sky noise used in the flux uncertainty: sigma-clipped std of
+            the whole image, of every 8th row and column (``"strided"``),
+            the MAD of 100k random pixels (``"mad"``), or the std of each
+            source's own background annulus (``"local"``).
+        sources : {"all", "target"}, optional
+            Sources measured by ``process_image``. ``"all"`` measures every
+            catalog source in the frame. ``"target"`` measures only the
+            target and its neighbors within ``neighbor_radius``, so the
+            per-frame work does not grow with the catalog radius.
+        neighbor_radius : float or None, optional
+            Neighbor radius in pixels for ``sources="target"``. Defaults to
+            ``aperture_radius + annulus_outer``, i.e. every source whose
+            aperture can overlap the target's aperture or annulus.
+        output_mode : {"target", "all"}, optional
+            ``"target"`` writes only the target row of each frame.
+            ``"all"`` additionally writes every measured source of the
+            frame to the run's ``PhotometryStore`` (see ``open_store``),
+            so comparison stars need no reprocessing.
 
         Notes
         -----
@@ -69,14 +254,48 @@ class TessPhotometry:
         self.annulus_inner = annulus_inner
         self.annulus_outer = annulus_outer
         self.zeropoint = zeropoint
+        self.cutout_margin = cutout_margin
         self.epadu = 5.22  # TESS gain
 
-    @functools.lru_cache(maxsize=128)
-    def load_catalog(self, catalog_file: str):
+        if photometry_engine not in ("photutils", "sparse"):
+            raise ValueError(f"Unknown photometry engine '{photometry_engine}'")
+        self.photometry_engine = photometry_engine
+        self._sparse_engines = {}
+
+        if centroid_method not in CENTROID_METHODS:
+            raise ValueError(f"Unknown centroid method '{centroid_method}'")
+        self.centroid_method = centroid_method
+
+        if astrometry not in ("per_source", "global"):
+            raise ValueError(f"Unknown astrometry mode '{astrometry}'")
+        self.astrometry = astrometry
+        self.n_reference = n_reference
+        self.fit_rotation = fit_rotation
+        self.isolation_radius = isolation_radius
+
+        if noise_method not in NOISE_ESTIMATORS and noise_method != "local":
+            raise ValueError(f"Unknown noise method '{noise_method}'")
+        self.noise_method = noise_method
+
+        if sources not in ("all", "target"):
+            raise ValueError(f"Unknown sources mode '{sources}'")
+        self.sources = sources
+        self.neighbor_radius = neighbor_radius
+        self._target_catalog = None
+        self._resolved_target = None
+
+        if output_mode not in ("target", "all"):
+            raise ValueError(f"Unknown output mode '{output_mode}'")
+        self.output_mode = output_mode
+
+    def load_catalog(self, catalog_file: str) -> SourceCatalog:
 
         """
         Load a Gaia source catalog from a CSV file.
 
+        Catalogs are shared through the process-wide cache, so repeated
+        calls from any instance only parse the file once per process.
+
         Parameters
         ----------
         catalog_file : str
@@ -85,31 +304,132 @@ class TessPhotometry:
 
         Returns
         -------
-        list of tuple
-            List of `(ra, dec, source_id)` entries for all catalog sources.
+        SourceCatalog
+            Array-backed catalog with one row per source.
+        """
+        return load_catalog_cached(catalog_file)
+
+
+    def target_catalog(
+            self,
+            catalog: SourceCatalog,
+            target_star: StarData
+        ) -> SourceCatalog:
+        """
+        Restrict a catalog to the target and its close neighbors.
+
+        Neighbors are the sources within ``neighbor_radius`` pixels of the
+        target (converted with the nominal TESS plate scale), which can
+        contaminate its aperture or background annulus. The selection is
+        computed once and reused while the catalog and target are the same.
+
+        Parameters
+        ----------
+        catalog : SourceCatalog
+            Full source catalog.
+        target_star : StarData
+            Target star.
+
+        Returns
+        -------
+        SourceCatalog
+            Catalog holding the target and its neighbors.
+        """
+        key = (target_star.ra, target_star.dec)
+        if (
+            self._target_catalog is not None
+            and self._target_catalog[0] is catalog
+            and self._target_catalog[1] == key
+        ):
+            return self._target_catalog[2]
+
+        radius = self.neighbor_radius
+        if radius is None:
+            radius = self.aperture_radius + self.annulus_outer
+
+        target_coord = SkyCoord(target_star.ra, target_star.dec, unit=u.deg)
+        separations = target_coord.separation(
+            SkyCoord(catalog.ra, catalog.dec, unit=u.deg)
+        ).arcsec
+
+        selected = catalog.subset(separations <= radius * TESS_PIXEL_SCALE)
+        self._target_catalog = (catalog, key, selected)
+
+        return selected
+
+    def resolve_target(
+            self,
+            catalog: SourceCatalog,
+            target_star: StarData,
+            max_sep_arcsec: float = 0.5
+        ) -> Optional[int]:
+        """
+        Find the catalog row of the target star.
+
+        The row is looked up by ``target_star.gaia_id``. Only if the star
+        has no Gaia ID, or the ID is not in the catalog, is the nearest
+        source within ``max_sep_arcsec`` used instead. The result is
+        cached while the catalog and target are the same, so per-frame
+        lookups are a comparison against a single source ID.
+
+        Parameters
+        ----------
+        catalog : SourceCatalog
+            Source catalog.
+        target_star : StarData
+            Target star.
+        max_sep_arcsec : float, optional
+            Maximum separation for the positional fallback.
+
+        Returns
+        -------
+        int or None
+            Row index of the target in ``catalog``, or None if it cannot be
+            identified.
         """
-        df = pd.read_csv(catalog_file, dtype={"source_id": str})
+        key = (target_star.gaia_id, target_star.ra, target_star.dec, max_sep_arcsec)
+        if (
+            self._resolved_target is not None
+            and self._resolved_target[0] is catalog
+            and self._resolved_target[1] == key
+        ):
+            return self._resolved_target[2]
 
-        coords = SkyCoord(df["ra"], df["dec"], unit=u.deg)
+        index = None
+        if target_star.gaia_id is not None:
+            index = catalog.index_of(target_star.gaia_id)
 
-        catalog = [
-            (coords[i].ra.deg, coords[i].dec.deg, df["source_id"].iloc[i])
-            for i in range(len(df))
-        ]
+        if index is None and len(catalog) > 0:
+            target_coord = SkyCoord(target_star.ra, target_star.dec, unit=u.deg)
+            separations = target_coord.separation(
+                SkyCoord(catalog.ra, catalog.dec, unit=u.deg)
+            ).arcsec
+            nearest = int(np.argmin(separations))
+            if separations[nearest] <= max_sep_arcsec:
+                index = nearest
 
-        return catalog       
+        self._resolved_target = (catalog, key, index)
 
+        return index
 
-    def process_fits(self, fits_path: str, catalog: List[tuple]) -> Optional[Table]:
+    def process_fits(
+            self,
+            fits_path: Union[str, FrameCutout],
+            catalog: SourceCatalog,
+            hdu: Optional[fits.ImageHDU] = None
+        ) -> Optional[Table]:
         """
         Process a single TESS FITS image and perform photometry on catalog sources.
 
         Parameters
         ----------
-        fits_path : str
-            Path to the TESS FFI FITS file.
-        catalog : list of tuple
-            Catalog entries as `(ra, dec, source_id)`.
+        fits_path : str or FrameCutout
+            Path to the TESS FFI FITS file, or a cutout of one.
+        catalog : SourceCatalog
+            Catalog of sources to measure.
+        hdu : astropy.io.fits.ImageHDU, optional
+            Image extension of ``fits_path`` already opened by the caller
+            (see ``open_frame``), so the file is not opened again.
 
         Returns
         -------
@@ -117,42 +437,272 @@ class TessPhotometry:
             Table containing photometric measurements and metadata for all
             detected catalog sources in the frame, or None if no sources fall
             within the image footprint.
+
+        Notes
+        -----
+        For a cutout, only sources whose background annulus lies entirely
+        inside the cutout are measured, so no aperture is truncated by the
+        cutout edges. With ``cutout_margin`` set, local files are read as
+        cutouts through ``read_cutout``.
         """
-        with fits.open(fits_path) as hdul:
-            image = hdul[1].data
-            header = hdul[1].header
-            wcs = WCS(header)
-        
-        # Filter objects in frame
-        objects_in_frame = []
-        for ra, dec, obj_id in catalog:
-            try:
-                x, y = SkyCoord(ra, dec, unit=u.deg).to_pixel(wcs)
-                if (0 <= x < image.shape[1] and 0 <= y < image.shape[0]):
-                    objects_in_frame.append((ra, dec, obj_id, x, y))
-            except Exception as e:
-                continue
-        
-        if not objects_in_frame:
+        if not isinstance(fits_path, FrameCutout) and self.cutout_margin is not None:
+            fits_path = self.read_cutout(fits_path, catalog, hdu=hdu)
+            if fits_path is None:
+                return None
+
+        if isinstance(fits_path, FrameCutout):
+            image = fits_path.image
+            header = fits_path.header
+
+            # Filter objects in frame
+            x, y, in_frame = self._project_catalog(
+                WCS(header), catalog.ra, catalog.dec, image.shape,
+                origin=(fits_path.x0, fits_path.y0)
+            )
+            in_frame &= self._inside_cutout(fits_path, x, y)
+        else:
+            with self.open_frame(fits_path, hdu) as hdu:
+                header = hdu.header
+                shape = (header["NAXIS2"], header["NAXIS1"])
+
+                # Filter objects in frame from the header alone; the pixel
+                # data is only read if some source lands on the detector.
+                x, y, in_frame = self._project_catalog(
+                    WCS(header), catalog.ra, catalog.dec, shape
+                )
+                image = hdu.data if np.any(in_frame) else None
+
+        if not np.any(in_frame):
             #print("no object in frame")
             return None
-        
+
+        objects_in_frame = catalog.subset(in_frame)
+
         # Extract positions
-        positions = [(pos[3], pos[4]) for pos in objects_in_frame]
-        
+        positions = np.column_stack([x[in_frame], y[in_frame]])
+
         # Perform photometry
-        result_table = self._perform_aperture_photometry(image, positions)
-        
+        frame_key = (header.get('CAMERA'), header.get('CCD'))
+        result_table, valid = self._perform_aperture_photometry(
+            image, positions, frame_key=frame_key, mags=objects_in_frame.mag
+        )
+        objects_in_frame = objects_in_frame.subset(valid)
+
         # Add metadata
-        result_table['RA'] = [pos[0] for pos in objects_in_frame]
-        result_table['DEC'] = [pos[1] for pos in objects_in_frame]
-        result_table['ID'] = [pos[2] for pos in objects_in_frame]
+        result_table['RA'] = objects_in_frame.ra
+        result_table['DEC'] = objects_in_frame.dec
+        result_table['ID'] = objects_in_frame.source_id
         result_table['DATE-OBS'] = header.get('DATE-OBS', '')
 
+        pointing = result_table.meta.get('pointing')
+        if pointing is not None:
+            result_table['PTG_DX'] = pointing.dx
+            result_table['PTG_DY'] = pointing.dy
+            result_table['PTG_ROT'] = pointing.rotation
+            result_table['PTG_NREF'] = pointing.n_used
+
         return result_table
     
+    @staticmethod
+    @contextmanager
+    def open_frame(
+            fits_path: Union[str, FrameCutout],
+            hdu: Optional[fits.ImageHDU] = None
+        ):
+        """
+        Open the image extension of a local FFI, or reuse an open one.
+
+        Callers that check the footprint before measuring open the file
+        once here and pass the HDU on, so its header is parsed only once.
+
+        Parameters
+        ----------
+        fits_path : str or FrameCutout
+            Path to the TESS FFI FITS file. A cutout is already in memory
+            and yields None.
+        hdu : astropy.io.fits.ImageHDU, optional
+            Already opened image extension; yielded as is and left open.
+
+        Yields
+        ------
+        astropy.io.fits.ImageHDU or None
+            Image extension, whose data is only read when accessed.
+        """
+        if hdu is not None or isinstance(fits_path, FrameCutout):
+            yield hdu
+            return
+
+        with fits.open(fits_path, memmap=True) as hdul:
+            yield hdul[1]
+
+    def check_footprint(self, fits_path: Union[str, fits.Header], ra, dec) -> bool:
+        """
+        Check from the image header whether any sky position is on the frame.
+
+        Only the header of the image extension is read; the pixel data
+        is never touched.
+
+        Parameters
+        ----------
+        fits_path : str or astropy.io.fits.Header
+            Path to the TESS FFI FITS file, or the header of its image
+            extension if already read.
+        ra, dec : float or array_like
+            Sky positions in degrees (ICRS), e.g. the target or the
+            whole catalog.
+
+        Returns
+        -------
+        bool
+            True if at least one position falls on the image.
+        """
+        if isinstance(fits_path, fits.Header):
+            header = fits_path
+        else:
+            header = fits.getheader(fits_path, ext=1)
+        return bool(np.any(footprint_contains(header, ra, dec)))
+
+    def read_cutout(
+            self,
+            fits_path: str,
+            catalog: SourceCatalog,
+            hdu: Optional[fits.ImageHDU] = None
+        ) -> Optional[FrameCutout]:
+        """
+        Read the part of a local FFI needed to measure the catalog sources.
+
+        The file is memory-mapped and only the header is parsed up front.
+        The bounding box of the in-frame sources, padded by the annulus
+        radius and ``cutout_margin``, is then read through the HDU
+        ``section`` interface, so only those rows and columns are paged in.
+
+        Parameters
+        ----------
+        fits_path : str
+            Path to the TESS FFI FITS file.
+        catalog : SourceCatalog
+            Catalog of sources to measure.
+        hdu : astropy.io.fits.ImageHDU, optional
+            Image extension of ``fits_path`` already opened by the caller.
+
+        Returns
+        -------
+        FrameCutout or None
+            Cutout covering every in-frame source, or None if no source
+            falls within the image footprint.
+        """
+        margin = self.cutout_margin or 0
+        # Room for the annulus, the 3x3 centroid box and rounding.
+        pad = self.annulus_outer + margin + 2
+
+        with self.open_frame(fits_path, hdu) as hdu:
+            header = hdu.header
+            ny, nx = header["NAXIS2"], header["NAXIS1"]
+
+            x, y, in_frame = self._project_catalog(
+                WCS(header), catalog.ra, catalog.dec, (ny, nx)
+            )
+            if not np.any(in_frame):
+                return None
+
+            x0 = max(int(np.floor(x[in_frame].min())) - pad, 0)
+            x1 = min(int(np.ceil(x[in_frame].max())) + pad + 1, nx)
+            y0 = max(int(np.floor(y[in_frame].min())) - pad, 0)
+            y1 = min(int(np.ceil(y[in_frame].max())) + pad + 1, ny)
+
+            image = np.array(hdu.section[y0:y1, x0:x1])
+
+        return FrameCutout(
+            image=image,
+            header=header,
+            x0=x0,
+            y0=y0,
+            filename=os.path.basename(fits_path),
+        )
+
+    def _inside_cutout(
+            self,
+            cutout: FrameCutout,
+            x: np.ndarray,
+            y: np.ndarray
+        ) -> np.ndarray:
+        """
+        Mask sources whose annulus would cross an edge of the cutout.
+
+        Edges shared with the full frame are not restricted, so sources
+        near the detector border are treated as in full-frame mode.
+        """
+        ny, nx = cutout.image.shape
+        frame_ny, frame_nx = cutout.frame_shape
+        m = self.annulus_outer
+
+        inside = np.ones(len(x), dtype=bool)
+        if cutout.x0 > 0:
+            inside &= x >= m
+        if cutout.x0 + nx < frame_nx:
+            inside &= x < nx - m
+        if cutout.y0 > 0:
+            inside &= y >= m
+        if cutout.y0 + ny < frame_ny:
+            inside &= y < ny - m
+
+        return inside
+
+    @staticmethod
+    def _project_catalog(
+            wcs: WCS,
+            ra: np.ndarray,
+            dec: np.ndarray,
+            shape: tuple,
+            origin: tuple = (0, 0),
+        ) -> tuple:
+        """
+        Project catalog sky positions onto the detector in a single WCS call.
+
+        Parameters
+        ----------
+        wcs : astropy.wcs.WCS
+            Celestial WCS of the image extension.
+        ra, dec : numpy.ndarray
+            Source coordinates in degrees (ICRS).
+        shape : tuple
+            Image shape as ``(ny, nx)``.
+        origin : tuple, optional
+            Full-frame pixel ``(x0, y0)`` of the image's first pixel, for
+            images that are cutouts of the frame described by ``wcs``.
+
+        Returns
+        -------
+        x, y : numpy.ndarray
+            Zero-based pixel coordinates relative to ``origin``. Sources
+            that fail to project are returned as NaN.
+        in_frame : numpy.ndarray
+            Boolean mask of sources that project onto the image footprint.
+        """
+        if len(ra) == 0:
+            empty = np.empty(0, dtype=np.float64)
+            return empty, empty, np.zeros(0, dtype=bool)
+
+        # quiet=True keeps a single non-converging SIP inversion from
+        # raising for the whole batch; bad rows are rejected below.
+        with np.errstate(invalid="ignore"):
+            x, y = wcs.all_world2pix(ra, dec, 0, quiet=True)
+
+        x = np.asarray(x, dtype=np.float64) - origin[0]
+        y = np.asarray(y, dtype=np.float64) - origin[1]
+
+        in_frame = (
+            np.isfinite(x) & np.isfinite(y)
+            & (x >= 0) & (x < shape[1])
+            & (y >= 0) & (y < shape[0])
+        )
+
+        return x, y, in_frame
+
     def _perform_aperture_photometry(self, image: np.ndarray, 
-                                    positions: List[tuple]) -> Table:
+                                    positions: np.ndarray,
+                                    frame_key: Optional[tuple] = None,
+                                    mags: Optional[np.ndarray] = None) -> Tuple[Table, np.ndarray]:
         """
         Perform aperture photometry at specified pixel positions.
 
@@ -160,50 +710,101 @@ class TessPhotometry:
         ----------
         image : numpy.ndarray
             2D image array extracted from the FITS file.
-        positions : list of tuple
-            Initial `(x, y)` pixel coordinates for photometry.
-        header : dict
-            FITS header (currently unused but retained for extensibility).
+        positions : numpy.ndarray
+            Initial `(x, y)` pixel coordinates for photometry, shape (N, 2).
+        frame_key : tuple, optional
+            Identifier of the detector (camera, CCD) the image comes
+            from; selects the cached weights of the sparse engine.
+        mags : numpy.ndarray, optional
+            Catalog magnitudes of the sources, used to rank reference
+            stars in global astrometry mode.
 
         Returns
         -------
         astropy.table.Table
             Table containing fluxes, magnitudes, and magnitude uncertainties
             for all successfully measured sources.
+        numpy.ndarray
+            Boolean mask over the input positions selecting the sources
+            present in the table (failed centroids are dropped).
+
+        Notes
+        -----
+        In global astrometry mode the table metadata holds the fitted
+        ``PointingOffset`` under ``'pointing'``.
         """
-        # Centroid refinement
-        x_init, y_init = zip(*positions)
-        x_cent, y_cent = centroid_sources(image, x_init, y_init, 
-                                         box_size=3, centroid_func=centroid_com)
+        x_init, y_init = positions[:, 0], positions[:, 1]
+
+        if self.astrometry == "global":
+            pointing = self._solve_pointing(image, x_init, y_init, mags)
+            x_cent, y_cent = pointing.apply(x_init, y_init)
+        else:
+            # Centroid refinement
+            pointing = None
+            x_cent, y_cent = CENTROID_METHODS[self.centroid_method](
+                image, x_init, y_init, box_size=3
+            )
         
         # Remove failed centroids
         valid = ~np.isnan(x_cent)
-        positions = [(x_cent[i], y_cent[i]) for i in range(len(x_cent)) if valid[i]]
-        
-        # Aperture definitions
-        aperture = CircularAperture(positions, r=self.aperture_radius)
-        annulus = CircularAnnulus(positions, r_in=self.annulus_inner, 
-                                 r_out=self.annulus_outer)
+        positions = np.column_stack([x_cent[valid], y_cent[valid]])
+
+        if not np.any(valid):
+            return Table(names=('flux', 'mag', 'mag_err', 'flux_err')), valid
         
-        # Photometry
-        phot_table = aperture_photometry(image, [aperture, annulus])
+        if self.photometry_engine == "sparse":
+            engine = self._sparse_engines.get(frame_key)
+            if engine is None:
+                engine = SparseApertureEngine(
+                    self.aperture_radius, self.annulus_inner, self.annulus_outer
+                )
+                self._sparse_engines[frame_key] = engine
+
+            if self.noise_method == "local":
+                aperture_sum, annulus_sum, annulus_sumsq = engine.sums(
+                    image, positions, squares=True
+                )
+            else:
+                aperture_sum, annulus_sum = engine.sums(image, positions)
+            aperture_area = engine.aperture_area
+            annulus_area = engine.annulus_area
+        else:
+            # Aperture definitions
+            aperture = CircularAperture(positions, r=self.aperture_radius)
+            annulus = CircularAnnulus(positions, r_in=self.annulus_inner, 
+                                     r_out=self.annulus_outer)
+
+            # Photometry
+            phot_table = aperture_photometry(image, [aperture, annulus])
+            aperture_sum = np.asarray(phot_table['aperture_sum_0'])
+            annulus_sum = np.asarray(phot_table['aperture_sum_1'])
+            aperture_area = aperture.area
+            annulus_area = annulus.area
+
+            if self.noise_method == "local":
+                annulus_sumsq = np.asarray(
+                    aperture_photometry(image * image, annulus)['aperture_sum']
+                )
         
         # Background subtraction
-        bkg_mean = phot_table['aperture_sum_1'] / annulus.area
-        bkg_sum = bkg_mean * aperture.area
-        final_flux = phot_table['aperture_sum_0'] - bkg_sum
+        bkg_mean = annulus_sum / annulus_area
+        bkg_sum = bkg_mean * aperture_area
+        final_flux = aperture_sum - bkg_sum
         
         # Calculate magnitudes
         magnitudes = self.zeropoint - 2.5 * np.log10(np.abs(final_flux))
         
         # Error estimation
-        _, _, std = sigma_clipped_stats(image, sigma=3.0)
+        if self.noise_method == "local":
+            std = annulus_std(annulus_sum, annulus_sumsq, annulus_area)
+        else:
+            std = NOISE_ESTIMATORS[self.noise_method](image)
 
         # Flux uncertainty (in electrons)
         flux_uncertainty = np.sqrt(
             np.abs(final_flux) / self.epadu +
-            aperture.area * std**2 +
-            aperture.area * std**2 / annulus.area
+            aperture_area * std**2 +
+            aperture_area * std**2 / annulus_area
         )
 
         # Magnitude uncertainty
@@ -215,13 +816,130 @@ class TessPhotometry:
         result['mag'] = magnitudes
         result['mag_err'] = mag_error
         result['flux_err'] = flux_uncertainty
+        if pointing is not None:
+            result.meta['pointing'] = pointing
         
-        return result
+        return result, valid
+
+    def _solve_pointing(
+            self,
+            image: np.ndarray,
+            x: np.ndarray,
+            y: np.ndarray,
+            mags: Optional[np.ndarray] = None
+        ) -> PointingOffset:
+        """
+        Fit the frame's pointing offset from a few reference stars.
+
+        References are the ``n_reference`` brightest isolated sources,
+        ranked by catalog magnitude or, without magnitudes, by the pixel
+        value at their predicted position. If too few references can be
+        centroided, a warning is printed and a zero offset is returned.
+        """
+        if mags is not None:
+            brightness = -mags
+        else:
+            ix = np.clip(np.round(x).astype(np.int64), 0, image.shape[1] - 1)
+            iy = np.clip(np.round(y).astype(np.int64), 0, image.shape[0] - 1)
+            brightness = np.asarray(image[iy, ix], dtype=np.float64)
+
+        refs = select_reference_stars(
+            x, y, brightness, image.shape,
+            n_reference=self.n_reference,
+            isolation_radius=self.isolation_radius,
+        )
+        x_ref, y_ref = CENTROID_METHODS[self.centroid_method](
+            image, x[refs], y[refs], box_size=3
+        )
+
+        pointing = fit_pointing_offset(
+            x[refs], y[refs], x_ref, y_ref, fit_rotation=self.fit_rotation
+        )
+        if pointing is None:
+            print(
+                f"[PID {os.getpid()}] "
+                f"Warning: only {int(np.sum(np.isfinite(x_ref) & np.isfinite(y_ref)))} "
+                f"usable reference stars, "
+                f"no pointing correction applied",
+                flush=True
+            )
+            return PointingOffset()
+
+        return pointing
     
+    def measure_frame(
+            self,
+            fits_file: Union[str, FrameCutout],
+            catalog: SourceCatalog,
+            target_star: StarData,
+            max_sep_arcsec: float = 0.5,
+            hdu: Optional[fits.ImageHDU] = None
+        ) -> Tuple[Optional[Table], Optional[int]]:
+        """
+        Measure a frame and locate the target's row, without writing.
+
+        Parameters
+        ----------
+        fits_file : str or FrameCutout
+            Path to a single TESS FITS image, or a cutout of one.
+        catalog : SourceCatalog
+            Catalog of sources to measure, restricted to the target and
+            its neighbors if ``sources="target"``.
+        target_star : StarData
+            Target star.
+        max_sep_arcsec : float, optional
+            Maximum separation for the positional target fallback.
+        hdu : astropy.io.fits.ImageHDU, optional
+            Image extension of ``fits_file`` already opened by the caller,
+            passed on to ``process_fits``.
+
+        Returns
+        -------
+        result : astropy.table.Table or None
+            Photometry of every measured source, or None if the target is
+            not in the catalog or no source was measured.
+        idx : int or None
+            Row of the target in ``result``, or None if it was not
+            measured in this frame.
+        """
+        if isinstance(fits_file, FrameCutout):
+            frame_name = fits_file.filename
+        else:
+            frame_name = os.path.basename(fits_file)
+
+        if self.sources == "target":
+            catalog = self.target_catalog(catalog, target_star)
+
+        target_index = self.resolve_target(catalog, target_star, max_sep_arcsec)
+        if target_index is None:
+            print(
+                f"[PID {os.getpid()}] "
+                f"Target not in catalog, skipping {frame_name}",
+                flush=True
+            )
+            return None, None
+
+        result = self.process_fits(fits_file, catalog, hdu=hdu)
+        if result is None or len(result) == 0:
+            return None, None
+
+        rows = np.flatnonzero(
+            np.asarray(result["ID"]) == catalog.source_id[target_index]
+        )
+        if len(rows) == 0:
+            print(
+                f"[PID {os.getpid()}] "
+                f"Target not found in {frame_name}",
+                flush=True
+            )
+            return result, None
+
+        return result, int(rows[0])
+
     def process_image(
             self,
-            fits_file: str,
-            catalog_file: str,
+            fits_file: Union[str, FrameCutout],
+            catalog_file: Union[str, SourceCatalog],
             target_star: StarData,
             output_dir: str = "./csv_results",
             max_sep_arcsec: float = 0.5
@@ -229,15 +947,50 @@ class TessPhotometry:
         """
         Process a single FITS file and extract photometry for a target source.
 
-        This method filters all detected sources in the frame and keeps only
-        the source below a maximum angular separation threshold.
+        Same as ``process_frame``, reporting only whether the target row
+        was saved.
+
+        Returns
+        -------
+        bool
+            True if the target source was detected and saved,
+            False otherwise.
+        """
+        return self.process_frame(
+            fits_file, catalog_file, target_star, output_dir, max_sep_arcsec
+        ) == SAVED
+
+    def process_frame(
+            self,
+            fits_file: Union[str, FrameCutout],
+            catalog_file: Union[str, SourceCatalog],
+            target_star: StarData,
+            output_dir: str = "./csv_results",
+            max_sep_arcsec: float = 0.5
+        ) -> str:
+        """
+        Process a single FITS file and extract photometry for a target source.
+
+        The target's catalog row is resolved once per catalog by Gaia
+        source_id (see ``resolve_target``), and each frame keeps only the
+        row with that ID. With ``output_mode="all"`` every measured source
+        is also written to the run's multi-star store, as one segment per
+        call; this is meant for sequential use (``PhotometryStore.compact``
+        merges the segments), parallel runs store all sources through
+        ``process_images_parallel(output_format="store")`` instead. With
+        ``sources="target"`` only the target and its neighbors are
+        measured (see ``target_catalog``). Frames
+        whose header WCS puts the target off the detector are rejected
+        before any pixel data is read, and recorded in ``output_dir`` so
+        later runs can skip them. A local file is opened once, and the
+        header read for this check is reused for the measurement.
 
         Parameters
         ----------
-        fits_file : str
-            Path to a single TESS FITS image.
-        catalog_file : str
-            Path to the Gaia catalog CSV file.
+        fits_file : str or FrameCutout
+            Path to a single TESS FITS image, or a cutout of one.
+        catalog_file : str or SourceCatalog
+            Path to the Gaia catalog CSV file, or an already loaded catalog.
         target_ra : float
             Target right ascension in degrees.
         target_dec : float
@@ -245,13 +998,16 @@ class TessPhotometry:
         output_dir : str, optional
             Directory where the output CSV file will be written.
         max_sep_arcsec : float, optional 
-            Maximum angular separation threshold.
+            Maximum angular separation threshold, used only when the target
+            has no ``gaia_id`` in the catalog.
 
         Returns
         -------
-        bool
-            True if the target source was detected and saved,
-            False otherwise.
+        str
+            ``SAVED`` if the target source was detected and saved,
+            ``OFF_DETECTOR`` if the frame was rejected from its header,
+            ``ERROR`` if reading or measuring the frame raised, and
+            ``NOT_FOUND`` otherwise.
 
         Notes
         -----
@@ -264,43 +1020,47 @@ class TessPhotometry:
 
         os.makedirs(output_dir, exist_ok=True)
 
-        catalog = self.load_catalog(catalog_file)
-
+        if isinstance(fits_file, FrameCutout):
+            frame_name = fits_file.filename
+        else:
+            frame_name = os.path.basename(fits_file)
 
-        target_coord = SkyCoord(
-            target_ra,
-            target_dec,
-            unit=u.deg
-        )
+        if isinstance(catalog_file, SourceCatalog):
+            catalog = catalog_file
+        else:
+            catalog = self.load_catalog(catalog_file)
 
         try:
-            result = self.process_fits(fits_file, catalog)
-            if result is None or len(result) == 0:
-                return False
-
-            coords = SkyCoord(
-                result["RA"],
-                result["DEC"],
-                unit=u.deg
-            )
+            with self.open_frame(fits_file) as hdu:
+                if (
+                    hdu is not None
+                    and not self.check_footprint(hdu.header, target_ra, target_dec)
+                ):
+                    record_rejected_frame(output_dir, frame_name, OFF_DETECTOR, target_star)
+                    print(
+                        f"[PID {os.getpid()}] "
+                        f"Target off-detector in {frame_name}",
+                        flush=True
+                    )
+                    return OFF_DETECTOR
 
-            separations = target_coord.separation(coords)
-            idx = np.argmin(separations)
+                result, idx = self.measure_frame(
+                    fits_file, catalog, target_star, max_sep_arcsec, hdu=hdu
+                )
+            if result is None:
+                return NOT_FOUND
+
+            if self.output_mode == "all":
+                open_store(output_dir).append(frame_name, result)
 
             # Reject frame if the star is not detected
-            if separations[idx].arcsec > max_sep_arcsec:
-                print(
-                    f"[PID {os.getpid()}] "
-                    f"Target not found (sep={separations[idx].arcsec:.2f}\") "
-                    f"in {os.path.basename(fits_file)}",
-                    flush=True
-                )
-                return False
+            if idx is None:
+                return NOT_FOUND
 
             # Keep only if it contains the star
             lambda_tau_row = result[idx:idx+1]
 
-            filename = os.path.basename(fits_file).replace(".fits", ".csv")
+            filename = frame_name.replace(".fits", ".csv")
             output_path = os.path.join(output_dir, filename)
             lambda_tau_row.write(output_path, overwrite=True)
 
@@ -310,7 +1070,7 @@ class TessPhotometry:
                 flush=True
             )
 
-            return True
+            return SAVED
         except Exception as e:
-            print(f"[PID {os.getpid()}] Error processing {fits_file}: {e}")
-            return False
+            print(f"[PID {os.getpid()}] Error processing {frame_name}: {e}")
+            return ERROR
@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+Columnar result store for the photometry of a run.
+
+Results are written as columnar segment files, one row per measured
+source and frame: Parquet when ``pyarrow`` is installed, compressed
+``.npz`` otherwise. A ``ResultsWriter`` thread in the parent process
+batches the frames returned by the workers into few large segments, so
+workers never touch the filesystem, and ``PhotometryStore.compact``
+merges segments into a single file. Reading the store concatenates the
+segments into one table indexed by ``(frame, source_id)``, so the light
+curve of any star measured in a run can be recovered without touching
+the FFIs again.
+"""
+
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from astropy.table import Table
+from astropy.time import Time
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Directory of the result store inside a photometry output directory.
+STORE_DIRNAME = "photometry_store"
+
+# Per-source columns copied from the photometry table into each segment.
+STORE_COLUMNS = ("flux", "flux_err", "mag", "mag_err", "RA", "DEC")
+
+# Per-frame pointing offset written in global astrometry mode, repeated on
+# every row of the frame and NaN for frames measured without it.
+POINTING_COLUMNS = ("PTG_DX", "PTG_DY", "PTG_ROT", "PTG_NREF")
+
+# Segment file types, by store format.
+SEGMENT_SUFFIXES = {"parquet": ".parquet", "npz": ".npz"}
+
+
+def frame_columns(frame_name: str, table: Table) -> Dict[str, np.ndarray]:
+    """
+    Convert the photometry table of one frame to store columns.
+
+    Parameters
+    ----------
+    frame_name : str
+        FITS file name of the frame.
+    table : astropy.table.Table
+        Output of ``TessPhotometry.process_fits``, or some of its rows.
+
+    Returns
+    -------
+    dict
+        One array per store column, one row per source.
+    """
+    n = len(table)
+    columns = {
+        "frame": np.full(n, frame_name),
+        "source_id": np.asarray(table["ID"]),
+        "DATE-OBS": np.asarray(table["DATE-OBS"]).astype(str),
+    }
+    for name in STORE_COLUMNS:
+        columns[name] = np.asarray(table[name], dtype=np.float64)
+    for name in POINTING_COLUMNS:
+        if name in table.colnames:
+            columns[name] = np.asarray(table[name], dtype=np.float64)
+        else:
+            columns[name] = np.full(n, np.nan)
+    return columns
+
+
+def _concat_columns(chunks: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    return {name: np.concatenate([c[name] for c in chunks]) for name in chunks[0]}
+
+
+class PhotometryStore:
+    """
+    Columnar store of per-source photometry rows.
+
+    Parameters
+    ----------
+    path : str
+        Directory holding the segments. Created on the first write.
+    format : {"parquet", "npz"} or None, optional
+        Format of new segments. Defaults to Parquet if ``pyarrow`` is
+        installed, else ``.npz``. Segments of both formats are read.
+
+    Notes
+    -----
+    Every segment is written to a temporary name and renamed, so readers
+    never see partial files and concurrent writers do not collide.
+    """
+
+    def __init__(self, path: str, format: Optional[str] = None):
+        if format is None:
+            format = "parquet" if pq is not None else "npz"
+        if format not in SEGMENT_SUFFIXES:
+            raise ValueError(f"Unknown store format '{format}'")
+        if format == "parquet" and pq is None:
+            raise ImportError("pyarrow is required for the parquet store format")
+
+        self.path = Path(path)
+        self.format = format
+
+    def write_segment(self, columns: Dict[str, np.ndarray], name: Optional[str] = None) -> Path:
+        """
+        Write rows as one new segment.
+
+        Parameters
+        ----------
+        columns : dict
+            Store columns as returned by ``frame_columns``, possibly
+            concatenated over several frames. A ``jd`` column is added
+            from ``DATE-OBS`` with a single ``Time`` conversion.
+        name : str, optional
+            Segment file name without suffix. Defaults to a unique name.
+
+        Returns
+        -------
+        pathlib.Path
+            Path of the written segment.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        columns = dict(columns)
+        if "jd" not in columns:
+            dates, inverse = np.unique(columns["DATE-OBS"], return_inverse=True)
+            jd = np.full(len(dates), np.nan)
+            valid = dates != ""
+            if np.any(valid):
+                jd[valid] = Time(dates[valid], format="isot", scale="utc").jd
+            columns["jd"] = jd[inverse.ravel()]
+
+        if name is None:
+            name = f"seg-{time.time_ns()}-{os.getpid()}"
+        suffix = SEGMENT_SUFFIXES[self.format]
+        segment = self.path / (name + suffix)
+        tmp_path = self.path / (name + ".tmp" + suffix)
+
+        if self.format == "parquet":
+            pq.write_table(pa.table(columns), tmp_path)
+        else:
+            np.savez_compressed(tmp_path, **columns)
+        os.replace(tmp_path, segment)
+
+        return segment
+
+    def append(self, frame_name: str, table: Table) -> Path:
+        """
+        Write the photometry of one frame as its own segment.
+
+        Parameters
+        ----------
+        frame_name : str
+            FITS file name of the frame.
+        table : astropy.table.Table
+            Output of ``TessPhotometry.process_fits`` for the frame.
+
+        Returns
+        -------
+        pathlib.Path
+            Path of the written segment.
+        """
+        return self.write_segment(frame_columns(frame_name, table), name=Path(frame_name).stem)
+
+    def segments(self) -> List[Path]:
+        """Return the segment files of the store, oldest first."""
+        if not self.path.is_dir():
+            return []
+        segments = [
+            p for p in self.path.iterdir()
+            if p.suffix in SEGMENT_SUFFIXES.values() and not p.stem.endswith(".tmp")
+        ]
+        return sorted(segments, key=lambda p: (p.stat().st_mtime_ns, p.name))
+
+    @staticmethod
+    def _read_segment(segment: Path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        # Columns missing from older segments are returned as NaN.
+        if segment.suffix == ".parquet":
+            if pq is None:
+                raise ImportError(f"pyarrow is required to read {segment}")
+            present = None
+            if columns is not None:
+                names = set(pq.read_schema(segment).names)
+                present = [name for name in columns if name in names]
+            df = pq.read_table(segment, columns=present).to_pandas()
+        else:
+            with np.load(segment) as data:
+                names = [n for n in columns if n in data.files] if columns is not None else data.files
+                df = pd.DataFrame({name: data[name] for name in names})
+
+        return df if columns is None else df.reindex(columns=columns)
+
+    def read(self, source_ids=None, segments: Optional[List[Path]] = None) -> pd.DataFrame:
+        """
+        Load the store as one table.
+
+        Parameters
+        ----------
+        source_ids : array_like, optional
+            Only keep rows of these sources.
+        segments : list of pathlib.Path, optional
+            Segments to read. Defaults to all of them.
+
+        Returns
+        -------
+        pandas.DataFrame
+            One row per (frame, source) with columns ``jd``, ``DATE-OBS``,
+            the photometry columns and the ``PTG_*`` pointing columns
+            (NaN without global astrometry), indexed by ``(frame, source_id)``
+            and sorted by time. If a frame was stored more than once,
+            the most recent rows are kept.
+        """
+        columns = ["frame", "source_id", "jd", "DATE-OBS", *STORE_COLUMNS, *POINTING_COLUMNS]
+        if segments is None:
+            segments = self.segments()
+
+        parts = []
+        for segment in segments:
+            df = self._read_segment(segment, columns=columns)
+            if source_ids is not None:
+                try:
+                    ids = np.asarray(source_ids).astype(df["source_id"].dtype)
+                except (TypeError, ValueError, OverflowError):
+                    ids = []
+                df = df[df["source_id"].isin(ids)]
+            parts.append(df)
+
+        if not parts:
+            return pd.DataFrame(columns=columns).set_index(["frame", "source_id"])
+
+        df = pd.concat(parts, ignore_index=True)
+        df = df.drop_duplicates(["frame", "source_id"], keep="last")
+        df = df.sort_values("jd", kind="stable")
+
+        return df.set_index(["frame", "source_id"])
+
+    def light_curve(self, source_id) -> pd.DataFrame:
+        """
+        Return the light curve of a single source.
+
+        Parameters
+        ----------
+        source_id : int or str
+            Catalog source ID of the star.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Time-sorted rows of the source, indexed by frame.
+        """
+        df = self.read(source_ids=[source_id])
+        return df.reset_index(level="source_id", drop=True)
+
+    def matrix(self, column: str = "flux", source_ids=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Return one photometry column as a (source, frame) matrix.
+
+        Parameters
+        ----------
+        column : str, optional
+            Photometry column to pivot, e.g. ``"flux"`` or ``"mag"``.
+        source_ids : array_like, optional
+            Only include these sources.
+
+        Returns
+        -------
+        jd : numpy.ndarray
+            Time of every frame, sorted.
+        source_id : numpy.ndarray
+            Source ID of every matrix row.
+        values : numpy.ndarray
+            Matrix of shape (n_sources, n_frames), NaN where a source was
+            not measured in a frame.
+        """
+        df = self.read(source_ids=source_ids).reset_index()
+        wide = df.pivot(index="source_id", columns="frame", values=column)
+        jd = df.drop_duplicates("frame").set_index("frame")["jd"].reindex(wide.columns).to_numpy()
+        order = np.argsort(jd, kind="stable")
+
+        return jd[order], wide.index.to_numpy(), wide.to_numpy(dtype=np.float64)[:, order]
+
+    def pointing(self) -> pd.DataFrame:
+        """
+        Return the pointing offset of every frame measured with one.
+
+        Returns
+        -------
+        pandas.DataFrame
+            One row per frame with ``jd`` and the ``PTG_*`` columns,
+            indexed by frame and sorted by time.
+        """
+        columns = ["frame", "jd", *POINTING_COLUMNS]
+        parts = []
+        for segment in self.segments():
+            df = self._read_segment(segment, columns=columns)
+            parts.append(df.drop_duplicates("frame", keep="last"))
+
+        if not parts:
+            return pd.DataFrame(columns=columns).set_index("frame")
+
+        df = pd.concat(parts, ignore_index=True)
+        df = df.drop_duplicates("frame", keep="last").dropna(subset=["PTG_DX"])
+        return df.sort_values("jd", kind="stable").set_index("frame")
+
+    def frames(self) -> List[str]:
+        """Return the names of the frames in the store."""
+        frames = set()
+        for segment in self.segments():
+            frames.update(self._read_segment(segment, columns=["frame"])["frame"])
+        return sorted(frames)
+
+    def compact(self, segments: Optional[List[Path]] = None) -> Optional[Path]:
+        """
+        Merge segments into a single segment file.
+
+        The merged segment is written before the inputs are removed, so
+        an interrupted compaction never loses rows.
+
+        Parameters
+        ----------
+        segments : list of pathlib.Path, optional
+            Segments to merge. Defaults to all segments of the store.
+
+        Returns
+        -------
+        pathlib.Path or None
+            Path of the merged segment, or None if there was nothing to
+            merge.
+        """
+        if segments is None:
+            segments = self.segments()
+        if len(segments) < 2:
+            return segments[0] if segments else None
+
+        df = self.read(segments=segments).reset_index()
+        columns = {name: df[name].to_numpy() for name in df.columns}
+        for name in ("frame", "DATE-OBS"):
+            columns[name] = columns[name].astype(str)
+        if columns["source_id"].dtype == object:
+            columns["source_id"] = columns["source_id"].astype(str)
+
+        merged = self.write_segment(columns, name=f"compact-{time.time_ns()}")
+        for segment in segments:
+            if segment != merged:
+                segment.unlink()
+
+        return merged
+
+    def __len__(self) -> int:
+        return len(self.segments())
+
+
+class ResultsWriter:
+    """
+    Background writer that batches frame results into store segments.
+
+    Frames passed to ``write`` are queued and a single thread appends
+    them to the store, flushing one segment per ``flush_frames`` frames.
+    On ``close`` the segments written by this writer are compacted into
+    one file per run.
+
+    A frame that cannot be converted, or whose segment cannot be written,
+    is recorded in ``failed_frames`` and the writer carries on with the
+    others; ``close`` then raises so the loss is never silent.
+
+    Parameters
+    ----------
+    store : PhotometryStore
+        Destination store.
+    flush_frames : int, optional
+        Number of frames buffered before a segment is written.
+    compact : bool, optional
+        Merge this writer's segments on close.
+    """
+
+    def __init__(self, store: PhotometryStore, flush_frames: int = 500, compact: bool = True):
+        self.store = store
+        self.flush_frames = max(flush_frames, 1)
+        self.compact = compact
+        self.frames_written = 0
+        self.failed_frames: List[str] = []
+        self.segments: List[Path] = []
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="coltess-results-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, frame_name: str, table: Table) -> None:
+        """Queue the photometry rows of one frame for writing."""
+        self._queue.put((frame_name, table))
+
+    def _flush(self, names: List[str], buffer: List[Dict[str, np.ndarray]]) -> None:
+        try:
+            self.segments.append(self.store.write_segment(_concat_columns(buffer)))
+            self.frames_written += len(buffer)
+        except Exception as e:
+            print(f"Error writing {len(buffer)} frames to {self.store.path}: {e}", flush=True)
+            self.failed_frames.extend(names)
+
+    def _run(self) -> None:
+        names, buffer = [], []
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            frame_name, table = item
+            try:
+                buffer.append(frame_columns(frame_name, table))
+            except Exception as e:
+                print(f"Error converting {frame_name} for the store: {e}", flush=True)
+                self.failed_frames.append(frame_name)
+                continue
+            names.append(frame_name)
+            if len(buffer) >= self.flush_frames:
+                self._flush(names, buffer)
+                names, buffer = [], []
+        if buffer:
+            self._flush(names, buffer)
+
+    def close(self) -> Optional[Path]:
+        """
+        Flush the queued frames and stop the writer thread.
+
+        Returns
+        -------
+        pathlib.Path or None
+            The run's compacted segment (or its only segment), if any.
+
+        Raises
+        ------
+        RuntimeError
+            If any frame could not be written. The frames that were
+            written are kept (and compacted) either way.
+        """
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+        if self.compact and len(self.segments) > 1:
+            self.segments = [self.store.compact(self.segments)]
+
+        if self.failed_frames:
+            shown = ", ".join(self.failed_frames[:5])
+            more = f" and {len(self.failed_frames) - 5} more" if len(self.failed_frames) > 5 else ""
+            raise RuntimeError(
+                f"{len(self.failed_frames)} frames were not written to {self.store.path}: "
+                f"{shown}{more}"
+            )
+
+        return self.segments[-1] if self.segments else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_store(output_dir: str, format: Optional[str] = None) -> PhotometryStore:
+    """
+    Open the result store of a photometry output directory.
+
+    Parameters
+    ----------
+    output_dir : str
+        Directory passed as ``output_dir`` to ``process_image`` or
+        ``process_images_parallel``.
+    format : {"parquet", "npz"} or None, optional
+        Format of new segments, see ``PhotometryStore``.
+
+    Returns
+    -------
+    PhotometryStore
+        Store at ``<output_dir>/photometry_store``.
+    """
+    return PhotometryStore(os.path.join(output_dir, STORE_DIRNAME), format=format)
@@ -1,7 +1,9 @@
 
 import os
 import pickle #DONT USE PICKLE, CHANGE IT TO NPZ WHEN YOU IMPLEMENT THIS!!!!!
-from typing import Optional
+from typing import Dict, Optional
+
+from coltess.core import StarData
 
 """
 DONT USE PICKLE, CHANGE IT TO NPZ WHEN YOU IMPLEMENT THIS!!!!!
@@ -19,3 +21,71 @@ def load_checkpoint(filename: str = "checkpoint.pkl") -> Optional[int]:
         with open(filename, "rb") as f:
             return pickle.load(f)
     return None
+
+
+# Frames that can never contain a target, one "<fits name> <reason> <target>"
+# per line. Rejections depend on the target, so records of other targets
+# (or older records without one) never skip a frame.
+REJECTED_FRAMES_FILE = "rejected_frames.txt"
+
+
+def rejection_target(target_star: StarData) -> str:
+    """Target key of a rejection record: the position as ``"ra,dec"``."""
+    return f"{target_star.ra:.6f},{target_star.dec:.6f}"
+
+
+def record_rejected_frame(
+        output_dir: str,
+        frame_name: str,
+        reason: str,
+        target_star: StarData
+    ) -> None:
+    """
+    Append a frame to the rejection record of an output directory.
+
+    Each record is a single short ``write`` on a file opened in append
+    mode, so concurrent workers can record frames safely.
+
+    Parameters
+    ----------
+    output_dir : str
+        Photometry output directory holding the record.
+    frame_name : str
+        FITS file name of the rejected frame.
+    reason : str
+        Short reason tag, e.g. ``"off_detector"``.
+    target_star : StarData
+        Target the frame was rejected for.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, REJECTED_FRAMES_FILE), "a") as f:
+        f.write(f"{frame_name} {reason} {rejection_target(target_star)}\n")
+
+
+def load_rejected_frames(output_dir: str, target_star: StarData) -> Dict[str, str]:
+    """
+    Load the rejection record of an output directory for one target.
+
+    Parameters
+    ----------
+    output_dir : str
+        Photometry output directory holding the record.
+    target_star : StarData
+        Only frames rejected for this target position are returned.
+
+    Returns
+    -------
+    dict
+        Mapping of FITS file name to rejection reason. Empty if nothing
+        has been recorded for the target.
+    """
+    path = os.path.join(output_dir, REJECTED_FRAMES_FILE)
+    target = rejection_target(target_star)
+    rejected = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 3 and parts[2] == target:
+                    rejected[parts[0]] = parts[1]
+    return rejected
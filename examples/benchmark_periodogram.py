@@ -0,0 +1,61 @@
+"""
+Compare the fixed and adaptive periodogram grids for speed and accuracy.
+
+Synthetic sinusoids sampled at the TESS FFI cadence (10 min) over one and
+three sectors are analyzed with the historical 20000-point grid and with
+the baseline-driven adaptive grid, with the automatic ("fast") and the
+exact ("cython") Lomb-Scargle methods, and the recovered periods
+compared. Periods are those of the refined top peak; the error of the
+raw grid maximum is shown alongside.
+"""
+import time
+
+import numpy as np
+
+from coltess.analysis import compute_periodogram
+
+TRUE_PERIOD = 3.7123  # days
+CADENCE = 10 / 1440   # days
+SECTOR_DAYS = 27.0
+
+
+def synthetic_light_curve(n_sectors, seed=0):
+    rng = np.random.default_rng(seed)
+    times = np.arange(0, n_sectors * SECTOR_DAYS, CADENCE)
+    # Drop the mid-sector downlink gaps.
+    times = times[(times % (SECTOR_DAYS / 2)) > 1.0]
+    fluxes = 1000 + 5 * np.sin(2 * np.pi * times / TRUE_PERIOD) + rng.normal(0, 3, len(times))
+    return times, fluxes
+
+
+def run(times, fluxes, **options):
+    start = time.perf_counter()
+    results = compute_periodogram(times, fluxes, min_period=0.1, max_period=10.0, **options)
+    elapsed = time.perf_counter() - start
+    grid_best = results["periods"][results["peaks"][0]]
+    best = results["peak_periods"][0]
+    return elapsed, best, grid_best, len(results["periods"]), results["method"]
+
+
+if __name__ == "__main__":
+    configurations = [
+        ("fixed", dict(grid="fixed")),
+        ("fixed", dict(grid="fixed", method="cython")),
+        ("adaptive x5", dict(grid="adaptive", samples_per_peak=5)),
+        ("adaptive x5", dict(grid="adaptive", samples_per_peak=5, method="cython")),
+        ("adaptive x10", dict(grid="adaptive", samples_per_peak=10)),
+    ]
+
+    for n_sectors in (1, 3):
+        times, fluxes = synthetic_light_curve(n_sectors)
+        # Frequency resolution of the data: peaks are ~1/T wide.
+        resolution = TRUE_PERIOD**2 / np.ptp(times)
+        print(f"\n{n_sectors} sector(s), {len(times)} points, "
+              f"period resolution ~{resolution:.4f} d")
+        print(f"{'grid':<14} {'method':<7} {'n_freq':>8} {'time [s]':>9} "
+              f"{'period':>9} {'error':>9} {'grid err':>9}")
+
+        for name, options in configurations:
+            elapsed, best, grid_best, n_freq, method = run(times, fluxes, **options)
+            print(f"{name:<14} {method:<7} {n_freq:>8} {elapsed:>9.3f} "
+                  f"{best:>9.4f} {best - TRUE_PERIOD:>+9.4f} {grid_best - TRUE_PERIOD:>+9.4f}")
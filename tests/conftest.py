@@ -0,0 +1,113 @@
+"""
+Shared fixtures: a local HTTP server with Range support and synthetic FFIs.
+"""
+
+import os
+import re
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+from astropy.io import fits
+from astropy.wcs import WCS
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Static file handler that honors single ``bytes=`` Range requests.
+
+    The server's ``plan`` controls misbehavior for the tests: ``fail`` is
+    a list of status codes returned (and consumed) before serving, and
+    ``ignore_range`` makes the server answer every request with the whole
+    file and status 200. Every request's Range header is logged in
+    ``server.requests``.
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, self.headers.get("Range")))
+            status = server.plan["fail"].pop(0) if server.plan["fail"] else None
+
+        if status is not None:
+            self.send_error(status)
+            return
+
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+
+        with open(path, "rb") as f:
+            data = f.read()
+        size = len(data)
+
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range") or "")
+        if match is None or server.plan["ignore_range"]:
+            self.send_response(200)
+            self.send_header("Content-Length", str(size))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+
+        start = int(match.group(1))
+        stop = int(match.group(2)) + 1 if match.group(2) else size
+        if start >= size:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        stop = min(stop, size)
+        self.send_response(206)
+        self.send_header("Content-Range", f"bytes {start}-{stop - 1}/{size}")
+        self.send_header("Content-Length", str(stop - start))
+        self.end_headers()
+        self.wfile.write(data[start:stop])
+
+
+@pytest.fixture
+def range_server(tmp_path):
+    """Serve ``tmp_path / "www"`` on localhost; yields the server."""
+    root = tmp_path / "www"
+    root.mkdir()
+
+    def handler(*args, **kwargs):
+        return RangeRequestHandler(*args, directory=str(root), **kwargs)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.root = root
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    server.lock = threading.Lock()
+    server.requests = []
+    server.plan = {"fail": [], "ignore_range": False}
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def synthetic_ffi(path, shape=(120, 160), ra=56.0, dec=12.5, seed=0):
+    """Write a small FFI-like file: empty primary HDU plus a float32 image with a TAN WCS."""
+    rng = np.random.default_rng(seed)
+    wcs = WCS(naxis=2)
+    wcs.wcs.ctype = ["RA---TAN", "DEC--TAN"]
+    wcs.wcs.crval = [ra, dec]
+    wcs.wcs.crpix = [shape[1] / 2, shape[0] / 2]
+    wcs.wcs.cdelt = [-21.0 / 3600, 21.0 / 3600]
+
+    image = rng.normal(1000, 15, shape).astype(np.float32)
+    header = wcs.to_header()
+    header["DATE-OBS"] = "2018-12-04T10:19:38"
+
+    primary = fits.PrimaryHDU()
+    primary.header["SECTOR"] = 5
+    fits.HDUList([primary, fits.ImageHDU(image, header=header)]).writeto(path)
+    return path
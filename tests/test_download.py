@@ -0,0 +1,178 @@
+"""
+DownloadEngine, fetch_fits_header and fetch_ffi_cutout against a local
+Range-capable HTTP server.
+"""
+
+import os
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from coltess.download import DownloadEngine, fetch_ffi_cutout, fetch_fits_header
+
+from conftest import synthetic_ffi
+
+FFI_NAME = "tess-s0005-1-4-ffic.fits"
+
+
+@pytest.fixture
+def engine():
+    with DownloadEngine(max_workers=2, retries=2, backoff=0.0, timeout=5.0,
+                        chunk_size=4096) as engine:
+        yield engine
+
+
+@pytest.fixture
+def ffi(range_server):
+    """Path and URL of a synthetic FFI served by the range server."""
+    path = synthetic_ffi(range_server.root / FFI_NAME)
+    return path, f"{range_server.url}/{FFI_NAME}"
+
+
+def test_download_whole_file(engine, ffi, tmp_path):
+    path, url = ffi
+    out = tmp_path / "out.fits"
+
+    result = engine.download(url, str(out))
+
+    assert result.ok and result.status == 200 and result.attempts == 1
+    assert out.read_bytes() == path.read_bytes()
+    assert result.nbytes == os.path.getsize(path)
+    assert not os.path.exists(str(out) + ".part")
+
+
+def test_download_resumes_from_part_file(engine, ffi, range_server, tmp_path):
+    path, url = ffi
+    out = tmp_path / "out.fits"
+    data = path.read_bytes()
+    (tmp_path / "out.fits.part").write_bytes(data[:5000])
+
+    result = engine.download(url, str(out))
+
+    assert result.ok and result.status == 206
+    assert range_server.requests[-1][1] == "bytes=5000-"
+    assert out.read_bytes() == data
+
+
+def test_download_retries_after_server_error(engine, ffi, range_server, tmp_path):
+    path, url = ffi
+    out = tmp_path / "out.fits"
+    range_server.plan["fail"] = [503, 500]
+
+    result = engine.download(url, str(out))
+
+    assert result.ok and result.attempts == 3
+    assert out.read_bytes() == path.read_bytes()
+
+
+def test_download_gives_up_after_retries(engine, ffi, range_server, tmp_path):
+    _, url = ffi
+    range_server.plan["fail"] = [503] * 3
+
+    result = engine.download(url, str(tmp_path / "out.fits"))
+
+    assert not result.ok and result.attempts == 3
+    assert result.error == "HTTP 503"
+
+
+def test_download_does_not_retry_client_errors(engine, range_server, tmp_path):
+    result = engine.download(f"{range_server.url}/missing.fits", str(tmp_path / "out.fits"))
+
+    assert not result.ok and result.status == 404 and result.attempts == 1
+
+
+def test_download_restarts_on_416(engine, ffi, range_server, tmp_path):
+    path, url = ffi
+    out = tmp_path / "out.fits"
+    data = path.read_bytes()
+    # Stale partial file longer than the remote file.
+    (tmp_path / "out.fits.part").write_bytes(data + b"\0" * 100)
+
+    result = engine.download(url, str(out))
+
+    assert result.ok and result.attempts == 2
+    assert [r for _, r in range_server.requests] == [f"bytes={len(data) + 100}-", None]
+    assert out.read_bytes() == data
+
+
+def test_download_handles_200_to_range_request(engine, ffi, range_server, tmp_path):
+    path, url = ffi
+    out = tmp_path / "out.fits"
+    (tmp_path / "out.fits.part").write_bytes(b"x" * 3000)
+    range_server.plan["ignore_range"] = True
+
+    result = engine.download(url, str(out))
+
+    assert result.ok and result.status == 200
+    assert out.read_bytes() == path.read_bytes()
+
+
+def test_download_many(engine, range_server, tmp_path):
+    paths = [synthetic_ffi(range_server.root / f"f{i}.fits", seed=i) for i in range(3)]
+    jobs = [(f"{range_server.url}/f{i}.fits", str(tmp_path / f"f{i}.fits")) for i in range(3)]
+
+    results = engine.download_many(jobs)
+
+    assert all(r.ok for r in results)
+    for path, (_, out) in zip(paths, jobs):
+        assert open(out, "rb").read() == path.read_bytes()
+
+
+@pytest.mark.parametrize("ignore_range", [False, True])
+def test_fetch_range(engine, ffi, range_server, ignore_range):
+    path, url = ffi
+    data = path.read_bytes()
+    range_server.plan["ignore_range"] = ignore_range
+
+    assert engine.fetch_range(url, 2880, 2880 + 1000) == data[2880:3880]
+    # Past the end: 416 from a Range server, an empty slice otherwise.
+    assert engine.fetch_range(url, len(data) + 10, len(data) + 20) == b""
+
+
+def test_fetch_range_retries_then_fails(engine, ffi, range_server):
+    _, url = ffi
+    range_server.plan["fail"] = [502]
+    assert len(engine.fetch_range(url, 0, 100)) == 100
+
+    range_server.plan["fail"] = [503] * 3
+    with pytest.raises(RuntimeError):
+        engine.fetch_range(url, 0, 100)
+
+
+@pytest.mark.parametrize("ignore_range", [False, True])
+def test_fetch_fits_header(engine, ffi, range_server, ignore_range):
+    path, url = ffi
+    range_server.plan["ignore_range"] = ignore_range
+
+    header, data_offset = fetch_fits_header(url, ext=1, engine=engine)
+
+    with fits.open(path) as hdul:
+        expected = hdul[1].header
+        assert data_offset == hdul.fileinfo(1)["datLoc"]
+    assert list(header.items()) == list(expected.items())
+
+    primary, _ = fetch_fits_header(url, ext=0, engine=engine)
+    assert primary["SECTOR"] == 5
+
+
+@pytest.mark.parametrize("ignore_range", [False, True])
+def test_fetch_ffi_cutout_matches_section(engine, ffi, range_server, ignore_range):
+    path, url = ffi
+    range_server.plan["ignore_range"] = ignore_range
+
+    # Centered, and clipped by the image corner.
+    for ra, dec, shape in [(56.0, 12.5, (21, 21)), (56.43, 12.18, (15, 18))]:
+        cutout = fetch_ffi_cutout(url, ra, dec, radius=10, engine=engine)
+
+        assert cutout is not None and cutout.filename == FFI_NAME
+        ny, nx = cutout.image.shape
+        with fits.open(path) as hdul:
+            section = hdul[1].section[cutout.y0:cutout.y0 + ny, cutout.x0:cutout.x0 + nx]
+        np.testing.assert_array_equal(cutout.image, section)
+        assert cutout.image.shape == shape and cutout.frame_shape == (120, 160)
+
+
+def test_fetch_ffi_cutout_off_image(engine, ffi):
+    _, url = ffi
+    assert fetch_ffi_cutout(url, 80.0, 30.0, radius=10, engine=engine) is None